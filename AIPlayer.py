@@ -1,21 +1,72 @@
 import math
-from collections import deque
-import heapq
 import random
-import copy
+import time
+from collections import namedtuple
 
-PAWN_MOVE_CODE = 0
-WALL_MOVE_CODE = 1
+import endgame
+import pathfinding
+from board import PAWN_MOVE_CODE, WALL_MOVE_CODE
+from position import Position
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from parallel_search import ParallelRootSearch
+from wall_legality import wall_legality_mask
+
+# Upper bound for iterative deepening when only a time/node budget limits the search
+MAX_SEARCH_DEPTH = 32
+
+# Pawns at most this many squares apart (Manhattan) are scored with jump-aware
+# distances (pathfinding.pawn_distance) instead of the plain distance fields
+JUMP_AWARE_RADIUS = 2
+
+# Remaining depth from which moves are ordered by their path impact (see move_impacts)
+IMPACT_ORDERING_MIN_DEPTH = 2
+
+# Width of the null windows used by principal variation search; scores are
+# multiples of 0.5, so any smaller width separates "better" from "not better"
+NULL_WINDOW = 1e-6
+
+# Half width of the aspiration window around the previous iteration's score
+# (4 points = one step of path difference in the heuristic)
+ASPIRATION_WINDOW = 4
+
+# Killer moves remembered per ply (quiet moves that caused a cutoff at that ply)
+KILLER_SLOTS = 2
+
+
+def move_id(move, rows, columns):
+    """
+    Compact integer id of a move, used to index the history table.
+
+    Pawn moves are numbered by target cell (0 .. rows*columns-1), followed by
+    the wall slots, two ids (horizontal, vertical) per slot.
+    """
+    if move[0] == PAWN_MOVE_CODE:
+        return move[1][0] * columns + move[1][1]
+    slot = move[1][0] * (columns - 1) + move[1][1]
+    return rows * columns + 2 * slot + (move[2] == 'v')
+
+
+# Outcome of a root search: the chosen move, its score, the deepest completed depth
+# and the principal variation (expected line of play starting with move)
+SearchResult = namedtuple('SearchResult', ['move', 'value', 'depth', 'pv'])
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time or node budget is exhausted"""
 
 class AIPlayer:
     """
     AI Player for Quoridor with three difficulty levels:
     - Easy: Random moves with basic validation
     - Medium: Greedy algorithm with simple heuristics (depth=1)
-    - Hard: Full minimax with alpha-beta pruning (depth=3)
+    - Hard: Minimax with alpha-beta pruning (depth=2, or iterative deepening under
+      a time budget), exact once the walls are used up (see endgame.py)
+    A fourth level, 'mcts', is provided by mcts.MCTSPlayer (see create_ai_player).
     """
     
-    def __init__(self, board=None, player_id=1, objective=0, difficulty='medium'):
+    def __init__(self, board=None, player_id=1, objective=0, difficulty='medium', tt_size_mb=16, workers=1,
+                 batched_walls=False, move_ordering=True, wall_impact_ordering=True, wall_pruning_ply=None,
+                 pvs=True, late_move_reductions=False, futility_pruning=True):
         """
         Initialize AIPlayer with all necessary attributes.
         
@@ -24,6 +75,26 @@ class AIPlayer:
             player_id: ID of this player (1 or 2)
             objective: Row/column the player needs to reach
             difficulty: 'easy', 'medium', or 'hard'
+            tt_size_mb: Memory budget of the transposition table in megabytes
+            workers: Number of processes for the hard level's root search (1 = serial)
+            batched_walls: Generate wall moves with the NumPy wall_legality_mask (all slots
+                flooded in one call) instead of one Board.can_place_*_wall call per slot
+            move_ordering: Search the hash move, killer moves and moves with a high history
+                score first; False only puts winning pawn moves first
+            wall_impact_ordering: With move_ordering, order the remaining moves by how much
+                they shorten the mover's path and lengthen the opponent's (see move_impacts)
+            wall_pruning_ply: From this ply on (root moves are ply 0), walls that change
+                neither player's shortest path length are not searched; None never prunes
+            pvs: Principal variation search: root moves share alpha, moves after the first
+                are searched with a null window, and each iteration starts with an
+                aspiration window around the previous score. False searches every root
+                move with a full window
+            late_move_reductions: Search moves late in the move order with reduced depth
+                first (tuned per difficulty with lmr_min_moves and lmr_reduction); only
+                applies to the null-window nodes of pvs. Off by default: it saved no time
+                at the depths the hard level reaches and sometimes missed the best move
+            futility_pruning: Skip moves just above the leaves that cannot reach the
+                search window (tuned per difficulty with futility_margin)
         """
         self.board = board
         self.id = player_id
@@ -31,6 +102,11 @@ class AIPlayer:
         self.pos = None  # Will be set by board initialization
         self.available_walls = 10  # Standard Quoridor rule
         
+        # Late move reductions and futility pruning of alpha_beta, tuned per difficulty below
+        self.lmr_min_moves = 4        # moves searched at full depth before reducing
+        self.lmr_reduction = 1        # plies taken off a late move
+        self.futility_margin = 0      # safety margin added to the futility bounds
+
         # Set parameters based on difficulty
         if difficulty.lower() == 'easy':
             self.search_depth = 0  # No search, random moves
@@ -41,33 +117,54 @@ class AIPlayer:
             self.wall_bonus_weight = 0.5
             self.difficulty = 'medium'
         else:  # hard
-            self.search_depth = 2  # Deep search
+            self.search_depth = 2  # Deep search, deeper under a time budget (iterative_deepening)
             self.wall_bonus_weight = 1.5
             self.difficulty = 'hard'
+            self.lmr_min_moves = 3
+            self.lmr_reduction = 2
+
+        # Search results kept across moves, keyed by the board's Zobrist key
+        self.transposition_table = TranspositionTable(tt_size_mb)
+        self.nodes = 0
+
+        # Budgets of the running search (None = unlimited), see iterative_deepening
+        self.deadline = None
+        self.node_limit = None
+        self.completed_depth = None
+        self.stop_event = None  # threading.Event set by the UI to cancel a background search
+
+        self.workers = workers
+        self.parallel_search = None  # Process pool, created on first parallel search
+        self.batched_walls = batched_walls
+
+        # Move ordering state, see order_moves
+        self.move_ordering = move_ordering
+        self.killers = []   # per ply: up to KILLER_SLOTS moves, most recent first
+        self.history = {}   # side to move -> list of cutoff scores indexed by move_id
+        self.wall_impact_ordering = wall_impact_ordering
+        self.wall_pruning_ply = wall_pruning_ply
+        self.pvs = pvs
+        self.late_move_reductions = late_move_reductions
+        self.futility_pruning = futility_pruning
+        self.principal_variation = []  # PV of the last search, see iterative_deepening
+        self.iteration_nodes = None  # nodes of the last completed iteration
 
     def apply_move(self, board, move):
-        """Apply a move to the board using Board class methods"""
-        if move[0] == PAWN_MOVE_CODE:
-            # Move pawn to new position using board's update method
-            new_position = tuple(move[1])
-            # Get the correct player from the board copy to ensure independence
-            if board.get_current_turn() == 1:
-                board.get_player1().set_position(new_position)
-            else:
-                board.get_player2().set_position(new_position)
-        elif move[0] == WALL_MOVE_CODE:
-            # Place wall using board's place_wall method
-            orientation = move[2]  # 'h' or 'v'
-            row, col = move[1]
-            # print("inside place wall")
-            board.place_wall(orientation, row, col)
-        
-        # Switch turn to other player
-        next_turn = 2 if board.get_current_turn() == 1 else 1
-        board.set_current_turn(next_turn)
+        """Apply a move to the board in place and return the token that undoes it"""
+        return board.make_move(move)
+
+    def undo_move(self, board, undo_token):
+        """Restore the board to its state before apply_move"""
+        board.unmake_move(undo_token)
+
+    def get_valid_moves(self, board, wall_filter=None):
+        """
+        Generate all valid moves for the current player using Board's methods
 
-    def get_valid_moves(self, board):
-        """Generate all valid moves for the current player using Board's methods"""
+        Args:
+            wall_filter: Optional predicate (orientation, row, col); wall slots it
+                rejects are skipped without checking their legality
+        """
         current_player = board.get_current_player()
         opponent = board.get_player2() if board.get_current_player() == board.get_player1() else board.get_player1()
         
@@ -81,52 +178,43 @@ class AIPlayer:
         # Get wall moves if player has walls remaining
         if current_player.get_number_of_walls() > 0:
             rows, cols = board.rows, board.columns
+            if self.batched_walls and wall_filter is None:
+                h_legal, v_legal = wall_legality_mask(board, use_numpy=True)
+                can_place_horizontal = lambda row, col: h_legal[row][col]
+                can_place_vertical = lambda row, col: v_legal[row][col]
+            else:
+                can_place_horizontal = board.can_place_horizontal_wall
+                can_place_vertical = board.can_place_vertical_wall
+
             # Check horizontal wall placements
             for row in range(rows - 1):
                 for col in range(cols - 1):
-                    if board.can_place_horizontal_wall(row, col):
+                    if (wall_filter is None or wall_filter('h', row, col)) and can_place_horizontal(row, col):
                         moves.append((WALL_MOVE_CODE, (row, col), 'h'))
             
             # Check vertical wall placements
             for row in range(rows - 1):
                 for col in range(cols - 1):
-                    if board.can_place_vertical_wall(row, col):
+                    if (wall_filter is None or wall_filter('v', row, col)) and can_place_vertical(row, col):
                         moves.append((WALL_MOVE_CODE, (row, col), 'v'))
         # print(f"Valid moves for player {current_player.get_name()}: {moves}")
         return moves
 
     def heuristic(self, board):
-        """Heuristic function using A* for both players"""
-        def manhattan_distance(y1, x1, y2):
-            return abs(y1 - y2)  # Only vertical movement matters for goal row
-
-        def a_star_path(start_pos, target_row, opponent_pos):
-            visited = set()
-            y, x = start_pos
-            heap = [(manhattan_distance(y, x, target_row), 0, y, x)]  # (f, g, y, x)
-
-            while heap:
-                f, g, cy, cx = heapq.heappop(heap)
-                if cy == target_row:
-                    return g
-                if (cy, cx) in visited:
-                    continue
-                visited.add((cy, cx))
-
-                # Check all four directions (single step)
-                for ny, nx in [(cy-1, cx), (cy+1, cx), (cy, cx-1), (cy, cx+1)]:
-                    if (ny, nx) not in visited and board.is_inside_board((ny, nx)):
-                        if not board.is_wall_between((cy, cx), (ny, nx)) and (ny, nx) != opponent_pos:
-                            h = manhattan_distance(ny, nx, target_row)
-                            heapq.heappush(heap, (g + 1 + h, g + 1, ny, nx))
-
-            return math.inf  # No path found
+        """Heuristic function using the goal distances of both players"""
+        p1_pos, p2_pos = board.get_player1_pos(), board.get_player2_pos()
+        p1_path = pathfinding.goal_distance(board, p1_pos, 0)
+        p2_path = pathfinding.goal_distance(board, p2_pos, board.rows - 1)
 
-        player1 = board.get_player1()
-        player2 = board.get_player2()
-        
-        p1_path = a_star_path(player1.get_position(), 0, player2.get_position())
-        p2_path = a_star_path(player2.get_position(), 8, player1.get_position())
+        # Close pawns can jump (or block) each other, count the real number of moves.
+        # A pawn that cannot get past a standing opponent keeps its plain distance.
+        if abs(p1_pos[0] - p2_pos[0]) + abs(p1_pos[1] - p2_pos[1]) <= JUMP_AWARE_RADIUS:
+            p1_jump = pathfinding.pawn_distance(board, p1_pos, p2_pos, 0)
+            p2_jump = pathfinding.pawn_distance(board, p2_pos, p1_pos, board.rows - 1)
+            if p1_jump != math.inf:
+                p1_path = p1_jump
+            if p2_jump != math.inf:
+                p2_path = p2_jump
 
         # Check for terminal states
         if p1_path == 0:
@@ -141,63 +229,571 @@ class AIPlayer:
         
         return path_diff + wall_bonus
 
-    def alpha_beta(self, board, depth, alpha, beta):
-        """Minimax with alpha-beta pruning"""
+    def alpha_beta(self, board, depth, alpha, beta, ply=1):
+        """
+        Minimax with alpha-beta pruning and a transposition table.
+
+        ply is the distance from the root (root moves lead to ply 1) and selects
+        the killer move slots.
+        """
+        self.nodes += 1
+        self.check_budget()
         player1 = board.get_player1()
         player2 = board.get_player2()
-        print("alpha beta depth: ", depth)
         # Check terminal states
         if player1.get_position()[0] == 0:  # Player 1 reached goal
             return -float('inf')
         if player2.get_position()[0] == 8:  # Player 2 reached goal
             return float('inf')
 
+        # Reuse a stored result if it was searched at least this deep
+        key = board.get_hash()
+        entry = self.transposition_table.probe(key)
+        hash_move = entry[4] if entry is not None else None
+        if entry is not None and entry[1] >= depth:
+            _, _, bound, score, _ = entry
+            if bound == EXACT:
+                return score
+            if bound == LOWER_BOUND:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+
         # Base case: reached depth limit
         if depth == 0:
-            return self.heuristic(board)
+            score = self.heuristic(board)
+            self.transposition_table.store(key, 0, EXACT, score, None)
+            return score
 
-        valid_moves = self.get_valid_moves(board)
+        window_alpha, window_beta = alpha, beta
+        best_move = None
+        maximizing = board.get_current_turn() == 2
 
-        # Move ordering: prioritize winning moves
-        def move_priority(move):
-            if move[0] == PAWN_MOVE_CODE:
-                target_pos = move[1]
-                current = board.get_current_player()
-                goal_row = 8 if board.get_current_player() == player2 else 0
-                if target_pos[0] == goal_row:
-                    return 0  # Winning move
-            return 1
-
-        valid_moves.sort(key=move_priority)
-        print(f"Valid moves: {valid_moves}")
-        if board.get_current_turn() == 2:  # Maximizing player
-            max_eval = -float('inf')
-            for move in valid_moves:
-                # Create a copy of the board state
-                board_copy = copy.deepcopy(board)
-                self.apply_move(board_copy, move)
-                eval_score = self.alpha_beta(board_copy, depth - 1, alpha, beta)
+        # Futility pruning just above the leaves: moves that cannot lift the score
+        # past the window are skipped. When that already holds for every wall that
+        # misses the opponent's shortest path, those walls are not even generated
+        futility = self.futility_bounds(board) if self.futility_pruning and depth == 1 else None
+        wall_filter = None
+        skipped_bound = None
+        if futility is not None:
+            wall_bound = futility[1] + (self.futility_margin if maximizing else -self.futility_margin)
+            if wall_bound <= alpha if maximizing else wall_bound >= beta:
+                cutting, columns = futility[2], board.columns
+                wall_filter = lambda orientation, row, col: (row * columns + col) in cutting[orientation == 'v']
+                skipped_bound = wall_bound
+
+        valid_moves = self.get_valid_moves(board, wall_filter)
+        prune = self.wall_pruning_ply is not None and ply >= self.wall_pruning_ply
+        impacts = None
+        # Scoring the walls costs about as much as evaluating every child, so just
+        # above the leaves it only pays off when it prunes
+        order_by_impact = self.move_ordering and self.wall_impact_ordering and depth >= IMPACT_ORDERING_MIN_DEPTH
+        if prune or order_by_impact:
+            impacts = self.move_impacts(board, valid_moves)
+        if prune:
+            # Walls that lengthen nobody's path only spend a wall
+            valid_moves = [move for move in valid_moves
+                           if move[0] == PAWN_MOVE_CODE or move == hash_move or impacts[move] != (0, 0)]
+        valid_moves = self.order_moves(board, valid_moves, hash_move, ply, impacts if order_by_impact else None)
+
+        if maximizing:  # Maximizing player
+            max_eval = skipped_bound if skipped_bound is not None else -float('inf')
+            for index, move in enumerate(valid_moves):
+                bound = self.futility_bound(board, move, futility) if futility is not None and index > 0 else None
+                if bound is not None:
+                    bound += self.futility_margin
+                    if bound <= alpha:
+                        max_eval = max(max_eval, bound)
+                        continue
+                eval_score = self.search_move(board, move, index, depth, alpha, beta, ply, True)
+                if eval_score > max_eval or best_move is None:
+                    best_move = move
                 max_eval = max(max_eval, eval_score)
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
+                    self.record_cutoff(board, move, depth, ply)
                     break  # Beta cutoff
+            self.store_result(key, depth, max_eval, window_alpha, window_beta, best_move)
             return max_eval
         else:  # Minimizing player
-            min_eval = float('inf')
-            for move in valid_moves:
-                # Create a copy of the board state
-                board_copy = copy.deepcopy(board)
-                self.apply_move(board_copy, move)
-                eval_score = self.alpha_beta(board_copy, depth - 1, alpha, beta)
+            min_eval = skipped_bound if skipped_bound is not None else float('inf')
+            for index, move in enumerate(valid_moves):
+                bound = self.futility_bound(board, move, futility) if futility is not None and index > 0 else None
+                if bound is not None:
+                    bound -= self.futility_margin
+                    if bound >= beta:
+                        min_eval = min(min_eval, bound)
+                        continue
+                eval_score = self.search_move(board, move, index, depth, alpha, beta, ply, False)
+                if eval_score < min_eval or best_move is None:
+                    best_move = move
                 min_eval = min(min_eval, eval_score)
                 beta = min(beta, eval_score)
                 if beta <= alpha:
+                    self.record_cutoff(board, move, depth, ply)
                     break  # Alpha cutoff
+            self.store_result(key, depth, min_eval, window_alpha, window_beta, best_move)
             return min_eval
 
-    def ai_move(self):
-        """Execute AI move based on difficulty level"""
-        board_copy = copy.deepcopy(self.board)
+    def search_move(self, board, move, index, depth, alpha, beta, ply, maximizing):
+        """
+        Score the index-th move of a node searched at depth with window (alpha, beta).
+
+        With pvs, every move after the first is first searched with a null window
+        and only searched with the full window if it beats the bound. With late move
+        reductions, moves from the lmr_min_moves-th on start lmr_reduction plies
+        shallower and are searched again at full depth if they beat the bound.
+        Only null-window nodes below the root are reduced, never the root or a PV
+        node, and a reduced move is still searched at least one ply deep.
+        """
+        reduction = 0
+        if (self.late_move_reductions and ply > 0 and index >= self.lmr_min_moves
+                and beta - alpha <= 2 * NULL_WINDOW):
+            reduction = max(0, min(self.lmr_reduction, depth - 2))
+
+        undo_token = self.apply_move(board, move)
+        try:
+            if index == 0 or (not self.pvs and reduction == 0):
+                return self.alpha_beta(board, depth - 1, alpha, beta, ply + 1)
+
+            # Only prove the move is no better than the bound, search it fully if it is
+            if self.pvs:
+                test_alpha, test_beta = (alpha, alpha + NULL_WINDOW) if maximizing else (beta - NULL_WINDOW, beta)
+            else:
+                test_alpha, test_beta = alpha, beta
+            eval_score = self.alpha_beta(board, depth - 1 - reduction, test_alpha, test_beta, ply + 1)
+            beats_bound = eval_score > alpha if maximizing else eval_score < beta
+            if reduction and beats_bound:
+                eval_score = self.alpha_beta(board, depth - 1, test_alpha, test_beta, ply + 1)
+                beats_bound = eval_score > alpha if maximizing else eval_score < beta
+            if beats_bound and alpha < eval_score < beta and (test_alpha, test_beta) != (alpha, beta):
+                eval_score = self.alpha_beta(board, depth - 1, alpha, beta, ply + 1)
+            return eval_score
+        finally:
+            self.undo_move(board, undo_token)
+
+    def futility_bounds(self, board):
+        """
+        Best leaf scores reachable from board in one move, for futility pruning at depth 1.
+
+        A pawn move's leaf score follows from the distance fields. A wall that does
+        not cut the opponent's cached shortest path (Board.path_edges) cannot
+        lengthen it, so its leaf score is at most (for player 2, at least for
+        player 1) the current path difference.
+
+        Returns:
+            (pawn_bounds, wall_bound, cutting): dict {target: score} of the non-winning
+            pawn moves, the bound of the walls missing the opponent's path and the
+            wall slots cutting it (Board.path_cutting_walls), or None if the pawns are
+            close enough for the jump-aware distances of the heuristic to apply after
+            the move
+        """
+        p1_pos, p2_pos = board.get_player1_pos(), board.get_player2_pos()
+        # A pawn moves at most two squares, further apart the heuristic uses the plain fields
+        if abs(p1_pos[0] - p2_pos[0]) + abs(p1_pos[1] - p2_pos[1]) <= JUMP_AWARE_RADIUS + 2:
+            return None
+
+        turn = board.get_current_turn()
+        cutting = board.path_cutting_walls(1 if turn == 2 else 2)
+        if cutting is None:
+            return None
+
+        columns = board.columns
+        p1_field = board.get_distance_field(0)
+        p2_field = board.get_distance_field(board.rows - 1)
+        p1_path = p1_field[p1_pos[0] * columns + p1_pos[1]]
+        p2_path = p2_field[p2_pos[0] * columns + p2_pos[1]]
+
+        # After the move the opponent is the current player, whose walls the heuristic counts
+        opponent = board.get_player1() if turn == 2 else board.get_player2()
+        wall_bonus = opponent.get_number_of_walls() * self.wall_bonus_weight
+
+        pawn_bounds = {}
+        if turn == 2:
+            own_pos, own_field, goal_row = p2_pos, p2_field, board.rows - 1
+        else:
+            own_pos, own_field, goal_row = p1_pos, p1_field, 0
+        for target in board.get_valid_moves(own_pos, p1_pos if turn == 2 else p2_pos):
+            if target[0] == goal_row:
+                continue
+            distance = own_field[target[0] * columns + target[1]]
+            if turn == 2:
+                pawn_bounds[target] = (p1_path - distance) * 4 + wall_bonus
+            else:
+                pawn_bounds[target] = (distance - p2_path) * 4 + wall_bonus
+
+        return pawn_bounds, (p1_path - p2_path) * 4 + wall_bonus, cutting
+
+    def futility_bound(self, board, move, futility):
+        """Bound of one move from futility_bounds, None if the move can change the opponent's path or wins"""
+        pawn_bounds, wall_bound, cutting = futility
+        if move[0] == PAWN_MOVE_CODE:
+            return pawn_bounds.get(move[1])
+        if move[1][0] * board.columns + move[1][1] in cutting[move[2] == 'v']:
+            return None
+        return wall_bound
+
+    def order_moves(self, board, moves, hash_move, ply, impacts=None):
+        """
+        Sort moves so the ones most likely to cause a cutoff are searched first.
+
+        Order: winning pawn moves, the transposition table's best move, this ply's
+        killer moves, then the rest by path gain (if impacts from move_impacts are
+        given) and history score. Ties keep the generation order (pawn moves
+        before walls, walls in raster order).
+        """
+        goal_row = board.rows - 1 if board.get_current_turn() == 2 else 0
+        if not self.move_ordering:
+            # Only prioritize winning moves
+            moves.sort(key=lambda move: 0 if move[0] == PAWN_MOVE_CODE and move[1][0] == goal_row else 1)
+            return moves
+
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.side_history(board)
+        rows, columns = board.rows, board.columns
+
+        def move_priority(move):
+            if move[0] == PAWN_MOVE_CODE and move[1][0] == goal_row:
+                return (0, 0)  # Winning move
+            if move == hash_move:
+                return (1, 0)
+            if move in killers:
+                return (2, killers.index(move))
+            if impacts is not None:
+                return (3, -sum(impacts[move]), -history[move_id(move, rows, columns)])
+            return (3, 0, -history[move_id(move, rows, columns)])
+
+        moves.sort(key=move_priority)
+        return moves
+
+    def move_impacts(self, board, moves):
+        """
+        Effect of every move on the shortest path lengths, from the cached distance fields.
+
+        Returns:
+            Dict {move: (own gain, opponent loss)}: how many steps the move takes off
+            the mover's path and adds to the opponent's. A pawn move only changes
+            the mover's own distance; walls are scored with pathfinding.wall_impacts.
+        """
+        if board.get_current_turn() == 2:
+            own_pos, own_goal = board.get_player2_pos(), board.rows - 1
+            opponent_pos, opponent_goal = board.get_player1_pos(), 0
+        else:
+            own_pos, own_goal = board.get_player1_pos(), 0
+            opponent_pos, opponent_goal = board.get_player2_pos(), board.rows - 1
+
+        field = board.get_distance_field(own_goal)
+        columns = board.columns
+        own_distance = field[own_pos[0] * columns + own_pos[1]]
+
+        impacts = {}
+        wall_deltas = None
+        for move in moves:
+            if move[0] == PAWN_MOVE_CODE:
+                impacts[move] = (own_distance - field[move[1][0] * columns + move[1][1]], 0)
+                continue
+            if wall_deltas is None:
+                wall_deltas = (pathfinding.wall_impacts(board, own_pos, own_goal),
+                               pathfinding.wall_impacts(board, opponent_pos, opponent_goal))
+            (row, column), grid = move[1], 0 if move[2] == 'h' else 1
+            impacts[move] = (-wall_deltas[0][grid][row][column], wall_deltas[1][grid][row][column])
+        return impacts
+
+    def side_history(self, board):
+        """History scores of the side to move, created on first use"""
+        side = board.get_current_turn()
+        if side not in self.history:
+            self.history[side] = [0] * (board.rows * board.columns + 2 * (board.rows - 1) * (board.columns - 1))
+        return self.history[side]
+
+    def record_cutoff(self, board, move, depth, ply):
+        """Remember a move that caused a cutoff as killer of its ply and in the history table"""
+        if not self.move_ordering:
+            return
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[KILLER_SLOTS:]
+
+        # Deeper cutoffs save more work, so they weigh more
+        self.side_history(board)[move_id(move, board.rows, board.columns)] += depth * depth
+
+    def new_search(self):
+        """
+        Prepare the move ordering state for a search from a new position.
+
+        Killer moves belong to the previous position's plies and are dropped;
+        history scores are halved so old cutoffs fade out.
+        """
+        self.killers = []
+        for scores in self.history.values():
+            for index, score in enumerate(scores):
+                scores[index] = score // 2
+        self.iteration_nodes = None
+
+    def store_result(self, key, depth, score, alpha, beta, best_move):
+        """Store a node result with the bound implied by the window it was searched with"""
+        if score <= alpha:
+            bound = UPPER_BOUND
+        elif score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(key, depth, bound, score, best_move)
+
+    def check_budget(self):
+        """Abort the running search once cancelled or its deadline or node budget is reached"""
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchTimeout()
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchTimeout()
+
+    def search_root(self, board, root_moves, depth, alpha=-float('inf'), beta=float('inf')):
+        """
+        Search every root move with alpha_beta(depth) and pick the best one.
+
+        With pvs the best score so far is alpha for the remaining root moves, which
+        are searched with a null window first (search_move, root moves are never
+        reduced), and the search stops at the first move scoring beta or more.
+        Ties go to the earliest move either way.
+
+        Args:
+            alpha, beta: Root window (aspiration window), only used with pvs
+
+        Returns:
+            (best_move, best_value, completed); on timeout completed is False and
+            the result only covers the root moves that finished. A best_value
+            outside (alpha, beta) is only a bound
+        """
+        best_move = None
+        best_value = -float('inf')
+
+        for index, move in enumerate(root_moves):
+            try:
+                if self.pvs:
+                    # The root is one ply above its children, which are searched at depth
+                    value = self.search_move(board, move, index, depth + 1, max(alpha, best_value), beta, 0, True)
+                else:
+                    undo_token = self.apply_move(board, move)
+                    try:
+                        value = self.alpha_beta(board, depth, -float('inf'), float('inf'))
+                    finally:
+                        self.undo_move(board, undo_token)
+            except SearchTimeout:
+                return best_move, best_value, False
+
+            if value > best_value:
+                best_value = value
+                best_move = move
+            if self.pvs and best_value >= beta:
+                break  # Fail high, the caller widens the window
+
+        return best_move, best_value, True
+
+    def search_root_moves(self, board, root_moves, depth, alpha=-float('inf'), beta=float('inf')):
+        """
+        Run search_root serially or on the worker pool, depending on self.workers.
+        The parallel search shares alpha through its own bound and ignores the window.
+        """
+        if self.workers <= 1:
+            return self.search_root(board, root_moves, depth, alpha, beta)
+
+        if self.parallel_search is None:
+            self.parallel_search = ParallelRootSearch(self.workers, self.engine_options())
+        move, value, completed, nodes = self.parallel_search.search_root(board, root_moves, depth, self.deadline)
+        self.nodes += nodes
+        return move, value, completed
+
+    def engine_options(self):
+        """Constructor arguments that rebuild this engine's search settings in a worker"""
+        return {
+            'difficulty': self.difficulty,
+            'tt_size_mb': self.transposition_table.size_mb,
+            'batched_walls': self.batched_walls,
+            'move_ordering': self.move_ordering,
+            'wall_impact_ordering': self.wall_impact_ordering,
+            'wall_pruning_ply': self.wall_pruning_ply,
+            'pvs': self.pvs,
+            'late_move_reductions': self.late_move_reductions,
+            'futility_pruning': self.futility_pruning,
+        }
+
+    def close(self):
+        """Stop the worker processes of the parallel search, if any"""
+        if self.parallel_search is not None:
+            self.parallel_search.shutdown()
+            self.parallel_search = None
+
+    def iterative_deepening(self, board, root_moves, time_budget=None, node_budget=None):
+        """
+        Search the root at depth 0, 1, 2, ... until the time or node budget runs out.
+
+        Each iteration searches the previous iteration's best move first. With pvs
+        (serial search only) it starts with an aspiration window of
+        ASPIRATION_WINDOW around the previous iteration's score and searches again
+        with a full window if the score falls outside. Without a budget this is a
+        single search at self.search_depth. The node budget is only enforced by
+        the serial search.
+
+        Args:
+            board: Position to search from
+            root_moves: Legal moves at the root
+            time_budget: Seconds available for this move, or None
+            node_budget: Maximum number of alpha_beta nodes, or None
+
+        Returns:
+            SearchResult with the best move of the deepest completed iteration, its
+            score and the principal variation (also kept in self.principal_variation)
+        """
+        if time_budget is None and node_budget is None:
+            depths = [self.search_depth]
+        else:
+            depths = range(MAX_SEARCH_DEPTH)
+
+        self.deadline = time.time() + time_budget if time_budget is not None else None
+        self.node_limit = node_budget
+        self.completed_depth = None
+        best_move = None
+        best_value = None
+
+        if self.move_ordering:
+            impacts = self.move_impacts(board, root_moves) if self.wall_impact_ordering else None
+            root_moves = self.order_moves(board, list(root_moves), None, 0, impacts)
+
+        try:
+            for depth in depths:
+                if best_move is not None:
+                    root_moves = [best_move] + [m for m in root_moves if m != best_move]
+
+                nodes_before = self.nodes
+                if self.pvs and self.workers <= 1 and best_value not in (None, float('inf'), -float('inf')):
+                    window = (best_value - ASPIRATION_WINDOW, best_value + ASPIRATION_WINDOW)
+                else:
+                    window = (-float('inf'), float('inf'))
+                move, value, completed = self.search_root_moves(board, root_moves, depth, *window)
+                if completed and not window[0] < value < window[1]:
+                    move, value, completed = self.search_root_moves(board, root_moves, depth)
+                # A partial iteration still fully searched its first move (the previous
+                # best), so any move it preferred is at least as good
+                if move is not None:
+                    best_move = move
+                if not completed:
+                    break
+                self.completed_depth = depth
+                self.iteration_nodes = self.nodes - nodes_before
+                best_value = value
+
+                # Forced win or loss found, deeper searches cannot change the result
+                if value in (float('inf'), -float('inf')):
+                    break
+        finally:
+            self.deadline = None
+            self.node_limit = None
+
+        if best_move is None:
+            best_move = root_moves[0]
+        depth = self.completed_depth if self.completed_depth is not None else 0
+        self.principal_variation = self.extract_pv(board, best_move, depth + 1)
+        return SearchResult(best_move, best_value, self.completed_depth, self.principal_variation)
+
+    def extract_pv(self, board, first_move, length):
+        """
+        Principal variation starting with first_move, at most length moves long.
+
+        Follows the best moves stored in the transposition table; the line ends
+        early at a finished game, a missing entry or a stored move that is not
+        legal in the position (an entry overwritten by another position).
+        """
+        pv = [first_move]
+        undo_tokens = [self.apply_move(board, first_move)]
+        try:
+            while len(pv) < length:
+                if board.get_player1_pos()[0] == 0 or board.get_player2_pos()[0] == board.rows - 1:
+                    break
+                entry = self.transposition_table.probe(board.get_hash())
+                if entry is None or entry[4] is None or entry[4] not in self.get_valid_moves(board):
+                    break
+                pv.append(entry[4])
+                undo_tokens.append(self.apply_move(board, entry[4]))
+        finally:
+            for undo_token in reversed(undo_tokens):
+                self.undo_move(board, undo_token)
+        return pv
+
+    def likely_replies(self, board, count):
+        """
+        The count moves the side to move is most likely to play, best first.
+
+        Uses the stored best move from the transposition table first, then ranks the
+        rest by the heuristic of the resulting position.
+        """
+        maximizing = board.get_current_turn() == 2
+        entry = self.transposition_table.probe(board.get_hash())
+        hash_move = entry[4] if entry is not None else None
+
+        scored = []
+        for move in self.get_valid_moves(board):
+            undo_token = self.apply_move(board, move)
+            score = self.heuristic(board)
+            self.undo_move(board, undo_token)
+            if move == hash_move:
+                score = float('inf') if maximizing else -float('inf')
+            scored.append((score, move))
+
+        scored.sort(key=lambda item: item[0], reverse=maximizing)
+        return [move for _, move in scored[:count]]
+
+    def effective_branching_factor(self):
+        """
+        Branching factor b of a uniform tree with as many nodes as the last
+        completed iteration: nodes = b ** (depth + 1), the root moves being the
+        first ply. None if no iteration completed.
+        """
+        if self.completed_depth is None or not self.iteration_nodes:
+            return None
+        return self.iteration_nodes ** (1 / (self.completed_depth + 1))
+
+    def get_search_stats(self):
+        """Node count and transposition table statistics of the last ai_move"""
+        stats = self.transposition_table.get_stats()
+        stats['nodes'] = self.nodes
+        stats['depth'] = self.completed_depth
+        stats['ebf'] = self.effective_branching_factor()
+        stats['pv'] = self.principal_variation
+        stats['reachability'] = pathfinding.get_reachability_stats()
+        stats['endgame'] = endgame.get_endgame_stats()
+        return stats
+
+    def ai_move(self, time_budget=None, node_budget=None):
+        """
+        Execute AI move based on difficulty level
+
+        Args:
+            time_budget: Seconds the hard level may think (iterative deepening), or None
+            node_budget: Maximum search nodes for the hard level, or None
+        """
+        self.nodes = 0
+        self.completed_depth = None
+        self.transposition_table.new_search()
+        self.new_search()
+        self.principal_variation = []
+        board_copy = Position.from_board(self.board)
+
+        # Pawn races are solved exactly (see endgame.py), no search or wall legality checks needed
+        if self.difficulty == 'hard':
+            solved = endgame.solve_endgame(board_copy)
+            if solved is not None:
+                self.principal_variation = [solved.move]
+                self.apply_move(self.board, solved.move)
+                return solved.move
+
         valid_moves = self.get_valid_moves(board_copy)
 
         if not valid_moves:
@@ -237,29 +833,17 @@ class AIPlayer:
             best_move = None
             best_score = -float('inf')
             print (valid_moves)
+            board_sim = board_copy
+
             for move in valid_moves:
-                board_sim = copy.deepcopy(self.board)
-                self.apply_move(board_sim, move)
-
-                # Compute shortest paths using A* or BFS
-                def shortest_path(pos, target_row):
-                    visited = set()
-                    queue = deque([(pos, 0)])
-                    while queue:
-                        (y, x), dist = queue.popleft()
-                        if (y, x) in visited:
-                            continue
-                        visited.add((y, x))
-                        if y == target_row:
-                            return dist
-                        for ny, nx in [(y-1, x), (y+1, x), (y, x-1), (y, x+1)]:
-                            if board_sim.is_inside_board((ny, nx)) and not board_sim.is_wall_between((y, x), (ny, nx)):
-                                queue.append(((ny, nx), dist+1))
-                    return float('inf')
-
-                my_path = shortest_path(board_sim.get_current_player().get_position(), goal_row)
+                undo_token = self.apply_move(board_sim, move)
+
+                # Pawn moves share the parent's distance fields, only wall moves compute new ones
+                my_path = pathfinding.goal_distance(board_sim, board_sim.get_current_player().get_position(), goal_row)
                 sim_opponent = board_sim.get_player2() if board_sim.get_current_turn() == 1 else board_sim.get_player1()
-                opp_path = shortest_path(sim_opponent.get_position(), opponent_goal_row)
+                opp_path = pathfinding.goal_distance(board_sim, sim_opponent.get_position(), opponent_goal_row)
+
+                self.undo_move(board_sim, undo_token)
 
                 # Score: maximize opponent path minus my path
                 score = opp_path - my_path
@@ -274,18 +858,7 @@ class AIPlayer:
             
         # Hard difficulty: Use minimax
         else:
-            best_move = None
-            best_value = -float('inf')
-            
-            for move in valid_moves:
-                board_copy = copy.deepcopy(self.board)
-                self.apply_move(board_copy, move)
-                value = self.alpha_beta(board_copy, self.search_depth, 
-                                       -float('inf'), float('inf'))
-
-                if value > best_value:
-                    best_value = value
-                    best_move = move
+            best_move = self.iterative_deepening(board_copy, valid_moves, time_budget, node_budget).move
 
             if best_move:
                 self.apply_move(self.board, best_move)
@@ -296,5 +869,9 @@ class AIPlayer:
 
 
 # Factory function for creating AI players
-def create_ai_player(board=None, player_id=1, objective=0, difficulty='medium'):
-    return AIPlayer(board=board, player_id=player_id, objective=objective, difficulty=difficulty)
\ No newline at end of file
+def create_ai_player(board=None, player_id=1, objective=0, difficulty='medium', tt_size_mb=16, workers=1):
+    if difficulty == 'mcts':
+        from mcts import MCTSPlayer
+        return MCTSPlayer(board=board, player_id=player_id, objective=objective, workers=workers)
+    return AIPlayer(board=board, player_id=player_id, objective=objective, difficulty=difficulty,
+                    tt_size_mb=tt_size_mb, workers=workers)
\ No newline at end of file
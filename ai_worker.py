@@ -0,0 +1,166 @@
+"""
+Background AI search for the pygame loop.
+The engine thinks on a private Position snapshot in a worker thread while the
+UI keeps drawing; the UI polls the returned handle once per frame and applies
+the move to the real board when it is done.
+
+While the human is thinking the worker can also ponder: it searches the
+positions after the human's most likely replies so that, if one of them is
+played, the AI answers instantly with the pondered (deeper) result.
+
+A thread is used rather than a process because main.py opens the pygame window
+at import time, which spawn-based process pools (Windows, macOS) would repeat
+in every worker. The GIL switch interval is lowered so the UI thread never
+waits long for the interpreter while the search is busy.
+"""
+
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from position import Position
+
+# Longest time (seconds) the search thread keeps the GIL before the UI thread gets a turn
+UI_SWITCH_INTERVAL = 0.001
+
+# Pondering budget: how many human replies are searched and for how long each
+PONDER_REPLIES = 3
+PONDER_TIME_PER_REPLY = 2.0
+
+
+class AIMoveHandle:
+    """Future-like handle of one background AI move"""
+
+    def __init__(self, future, stop_event):
+        self.future = future
+        self.stop_event = stop_event
+
+    def done(self):
+        """True once the search finished (or stopped after cancel())"""
+        return self.future.done()
+
+    def cancelled(self):
+        return self.stop_event.is_set()
+
+    def result(self):
+        """The chosen move, or None if the search was cancelled"""
+        move = self.future.result()
+        if self.cancelled():
+            return None
+        return move
+
+    def cancel(self):
+        """Ask the search to stop at its next node, its result will be discarded"""
+        self.stop_event.set()
+
+
+class AIWorker:
+    """Runs AIPlayer.ai_move on a single background thread"""
+
+    def __init__(self, engine):
+        """
+        Args:
+            engine: AIPlayer owned by the worker from now on; its board is replaced by
+                a snapshot for every search, so the live board is never touched
+        """
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.current = None
+        # Zobrist key of a position after a human reply -> (AI move, completed depth)
+        self.ponder_results = {}
+        # Depth the last budgeted search completed, the bar a ponder hit has to clear
+        self.timed_depth = None
+        sys.setswitchinterval(UI_SWITCH_INTERVAL)
+
+    def submit(self, board, time_budget=None, node_budget=None):
+        """
+        Start thinking about the position on board.
+
+        Any search still running (including pondering) is cancelled first. On a
+        ponder hit at least as deep as a normal search the handle is already done:
+        without a budget that is engine.search_depth, with one the depth the last
+        budgeted search completed (no hit before the first one has finished).
+
+        Returns:
+            AIMoveHandle to poll from the UI loop
+        """
+        self.cancel()
+        stop_event = threading.Event()
+
+        if time_budget is None and node_budget is None:
+            required_depth = self.engine.search_depth
+        else:
+            required_depth = self.timed_depth
+        ponder_hit = self.ponder_results.get(board.get_hash())
+        if ponder_hit is not None and required_depth is not None and ponder_hit[1] >= required_depth:
+            future = Future()
+            future.set_result(ponder_hit[0])
+            self.current = AIMoveHandle(future, stop_event)
+            return self.current
+
+        snapshot = Position.from_board(board)
+        future = self.executor.submit(self._think, snapshot, stop_event, time_budget, node_budget)
+        self.current = AIMoveHandle(future, stop_event)
+        return self.current
+
+    def _think(self, snapshot, stop_event, time_budget, node_budget):
+        self.engine.board = snapshot
+        self.engine.stop_event = stop_event
+        try:
+            move = self.engine.ai_move(time_budget, node_budget)
+            budgeted = time_budget is not None or node_budget is not None
+            if budgeted and not stop_event.is_set() and self.engine.completed_depth is not None:
+                self.timed_depth = self.engine.completed_depth
+            return move
+        finally:
+            self.engine.stop_event = None
+
+    def ponder(self, board, replies=PONDER_REPLIES, time_per_reply=PONDER_TIME_PER_REPLY):
+        """
+        Search the positions after the human's most likely replies in the background.
+
+        CPU use is bounded by replies * time_per_reply, memory by the engine's
+        transposition table and one stored result per reply. Only the hard level ponders.
+
+        Returns:
+            AIMoveHandle of the pondering task (its result is always None)
+        """
+        self.cancel()
+        stop_event = threading.Event()
+        snapshot = Position.from_board(board)
+        future = self.executor.submit(self._ponder, snapshot, stop_event, replies, time_per_reply)
+        self.current = AIMoveHandle(future, stop_event)
+        return self.current
+
+    def _ponder(self, snapshot, stop_event, replies, time_per_reply):
+        self.ponder_results = {}
+        if self.engine.difficulty != 'hard':
+            return None
+
+        self.engine.stop_event = stop_event
+        try:
+            for reply in self.engine.likely_replies(snapshot, replies):
+                if stop_event.is_set():
+                    break
+                position = Position.from_board(snapshot)
+                position.make_move(reply)
+                key = position.get_hash()
+
+                self.engine.board = position
+                move = self.engine.ai_move(time_budget=time_per_reply)
+                if move and self.engine.completed_depth is not None:
+                    self.ponder_results[key] = (move, self.engine.completed_depth)
+        finally:
+            self.engine.stop_event = None
+        return None
+
+    def cancel(self):
+        """Cancel the running search, if any"""
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def shutdown(self):
+        """Cancel the running search and wait for the thread to exit"""
+        self.cancel()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,182 @@
+"""
+Micro-benchmarks for the pathfinding backends and the hard AI search.
+Builds random legal wall layouts and times has_valid_path with every backend
+on the same positions, checking that all backends agree, then compares search
+settings of the hard level by nodes and effective branching factor.
+
+Usage:
+    python benchmark.py [positions] [seed]
+"""
+
+import random
+import sys
+import time
+
+import pathfinding
+import wall_legality
+from AIPlayer import AIPlayer
+from player import Player
+from position import Position
+
+# Positions searched by benchmark_search in main, the depth they are searched to
+# and the AIPlayer settings compared
+SEARCH_POSITIONS = 4
+SEARCH_DEPTH = 2
+SEARCH_SETTINGS = {
+    'plain': {'move_ordering': False, 'pvs': False, 'late_move_reductions': False, 'futility_pruning': False},
+    'move_ordering': {'wall_impact_ordering': False, 'pvs': False, 'late_move_reductions': False,
+                      'futility_pruning': False},
+    'wall_impact': {'pvs': False, 'late_move_reductions': False, 'futility_pruning': False},
+    'pvs': {'late_move_reductions': False, 'futility_pruning': False},
+    'futility': {'late_move_reductions': False},
+    'lmr': {'late_move_reductions': True},
+    'wall_pruning': {'wall_pruning_ply': 1},
+}
+
+
+def random_positions(count, seed=0, rows=9, columns=9):
+    """Positions with 0-20 random legal walls and random pawn squares"""
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        player1 = Player('player1', (rng.randrange(rows), rng.randrange(columns)), 1)
+        player2 = Player('player2', (rng.randrange(rows), rng.randrange(columns)), 2)
+        position = Position(player1, player2, rows, columns)
+        for _ in range(rng.randrange(21)):
+            row, column = rng.randrange(rows - 1), rng.randrange(columns - 1)
+            if rng.random() < 0.5:
+                if position.can_place_horizontal_wall(row, column):
+                    position.add_wall('h', row, column)
+            elif position.can_place_vertical_wall(row, column):
+                position.add_wall('v', row, column)
+        positions.append(position)
+    return positions
+
+
+def benchmark_has_valid_path(positions, repeat=5):
+    """
+    Time has_valid_path for both goal rows of every position with each backend.
+
+    Returns:
+        Dict {backend: seconds per call}
+    """
+    queries = [(position, start, goal)
+               for position in positions
+               for start in (position.get_player1_pos(), position.get_player2_pos())
+               for goal in (0, position.rows - 1)]
+
+    answers = {}
+    timings = {}
+    for backend in pathfinding.PATH_BACKENDS:
+        answers[backend] = [pathfinding.has_valid_path(p, s, g, backend) for p, s, g in queries]
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            for position, start, goal in queries:
+                pathfinding.has_valid_path(position, start, goal, backend)
+        timings[backend] = (time.perf_counter() - start_time) / (repeat * len(queries))
+
+    reference = answers[pathfinding.PATH_BACKENDS[0]]
+    for backend, result in answers.items():
+        if result != reference:
+            raise AssertionError(f"Backend {backend} disagrees with {pathfinding.PATH_BACKENDS[0]}")
+
+    return timings
+
+
+def benchmark_wall_legality(positions, repeat=3):
+    """
+    Time a full wall legality mask per position: batched NumPy routine vs per-wall checks.
+
+    Returns:
+        Dict {method: seconds per position}
+    """
+    methods = {'per_wall': wall_legality._legality_mask_per_wall}
+    if wall_legality.np is not None:
+        methods['numpy'] = wall_legality._legality_mask_numpy
+
+    timings = {}
+    for name, method in methods.items():
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            for position in positions:
+                # Drop the per-position caches so every method starts cold
+                position._path_edges = {}
+                position._tracked_wall_bits = None
+                method(position)
+        timings[name] = (time.perf_counter() - start_time) / (repeat * len(positions))
+
+    for position in positions:
+        reference = [list(map(bool, row)) for grid in methods['per_wall'](position) for row in grid]
+        for name, method in methods.items():
+            if [list(map(bool, row)) for grid in method(position) for row in grid] != reference:
+                raise AssertionError(f"Wall legality method {name} disagrees with per_wall")
+
+    return timings
+
+
+def benchmark_search(positions, settings):
+    """
+    Run the hard level's search to SEARCH_DEPTH from every position with each set
+    of AIPlayer options.
+
+    Every search starts with an empty transposition table. The AI moves as player 2;
+    positions where a pawn already stands on its goal row are skipped.
+
+    Args:
+        positions: Positions to search from
+        settings: Dict {name: AIPlayer keyword arguments}
+
+    Returns:
+        Dict {name: (nodes per search, mean effective branching factor, seconds per search, moves)}
+    """
+    positions = [position for position in positions
+                 if position.get_player1_pos()[0] != 0 and position.get_player2_pos()[0] != position.rows - 1]
+    results = {}
+    for name, options in settings.items():
+        engine = AIPlayer(difficulty='hard', **options)
+        engine.search_depth = SEARCH_DEPTH
+        nodes = 0
+        branching = []
+        moves = []
+        start_time = time.perf_counter()
+        for position in positions:
+            position.set_current_turn(2)
+            engine.nodes = 0
+            engine.transposition_table.clear()
+            engine.new_search()
+            moves.append(engine.iterative_deepening(position, engine.get_valid_moves(position)).move)
+            nodes += engine.nodes
+            branching.append(engine.effective_branching_factor())
+        elapsed = time.perf_counter() - start_time
+        results[name] = (nodes / len(positions), sum(branching) / len(branching), elapsed / len(positions), moves)
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    positions = random_positions(count, seed)
+
+    timings = benchmark_has_valid_path(positions)
+    baseline = timings['bfs']
+    print(f"has_valid_path over {count} positions")
+    for backend, seconds in timings.items():
+        print(f"  {backend:10s} {seconds * 1e6:8.1f} us/call  x{baseline / seconds:.1f}")
+
+    timings = benchmark_wall_legality(positions)
+    baseline = timings['per_wall']
+    print(f"wall legality mask over {count} positions")
+    for method, seconds in timings.items():
+        print(f"  {method:10s} {seconds * 1e3:8.2f} ms/position  x{baseline / seconds:.1f}")
+
+    # Full searches are slow, a handful of positions is enough to compare settings
+    search_positions = positions[:SEARCH_POSITIONS]
+    results = benchmark_search(search_positions, SEARCH_SETTINGS)
+    print(f"hard search to depth {SEARCH_DEPTH} over {len(search_positions)} positions")
+    for name, (nodes, branching, seconds, _) in results.items():
+        print(f"  {name:14s} {nodes:10.0f} nodes  ebf {branching:5.1f}  {seconds:6.2f} s/search")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Bitboard helpers for the Quoridor board.
+Cells are numbered row by row (index = row * columns + column) and every
+per-cell property is stored as one bit of a Python integer.
+
+Wall segments use the same numbering as Board.h_walls / Board.v_walls:
+    h bit i set -> edge between cell i and the cell below it is blocked
+    v bit i set -> edge between cell i and the cell to its right is blocked
+"""
+
+from functools import lru_cache
+
+
+def cell_index(position, columns):
+    """Convert a (row, col) tuple to its bit index."""
+    return position[0] * columns + position[1]
+
+
+def cell_position(index, columns):
+    """Convert a bit index back to a (row, col) tuple."""
+    return divmod(index, columns)
+
+
+@lru_cache(maxsize=None)
+def board_masks(rows, columns):
+    """
+    Precompute the constant masks for a board size.
+
+    Args:
+        rows: Number of rows on the board
+        columns: Number of columns on the board
+
+    Returns:
+        Dict with:
+            'full': every cell of the board
+            'row': list of masks, one per row
+            'not_first_row' / 'not_last_row': cells that have a neighbour above / below
+            'not_first_column' / 'not_last_column': cells that have a neighbour left / right
+    """
+    row_mask = (1 << columns) - 1
+    rows_list = [row_mask << (row * columns) for row in range(rows)]
+    full = (1 << (rows * columns)) - 1
+
+    first_column = 0
+    for row in range(rows):
+        first_column |= 1 << (row * columns)
+    last_column = first_column << (columns - 1)
+
+    return {
+        'full': full,
+        'row': rows_list,
+        'not_first_row': full & ~rows_list[0],
+        'not_last_row': full & ~rows_list[-1],
+        'not_first_column': full & ~first_column,
+        'not_last_column': full & ~last_column,
+    }
+
+
+def grid_to_bits(grid, columns):
+    """Pack a list-of-lists of booleans into a bitboard."""
+    bits = 0
+    for row, cells in enumerate(grid):
+        for column, value in enumerate(cells):
+            if value:
+                bits |= 1 << (row * columns + column)
+    return bits
+
+
+def bits_to_grid(bits, rows, columns):
+    """Unpack a bitboard into a list-of-lists of booleans."""
+    return [[bool(bits >> (row * columns + column) & 1) for column in range(columns)]
+            for row in range(rows)]
+
+
+def open_edges(h_bits, v_bits, rows, columns):
+    """
+    Compute, for each direction, the set of cells that can step that way.
+
+    Args:
+        h_bits: Horizontal wall segments bitboard
+        v_bits: Vertical wall segments bitboard
+        rows: Number of rows on the board
+        columns: Number of columns on the board
+
+    Returns:
+        Tuple (up, down, left, right) of bitboards
+    """
+    masks = board_masks(rows, columns)
+    up = masks['not_first_row'] & ~(h_bits << columns)
+    down = masks['not_last_row'] & ~h_bits
+    left = masks['not_first_column'] & ~(v_bits << 1)
+    right = masks['not_last_column'] & ~v_bits
+    return up, down, left, right
+
+
+# Step directions in the order Board.get_valid_moves tries them
+UP, DOWN, LEFT, RIGHT = range(4)
+DIRECTION_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+@lru_cache(maxsize=None)
+def neighbour_table(rows, columns):
+    """
+    Precompute the orthogonal neighbours of every cell.
+
+    Args:
+        rows: Number of rows on the board
+        columns: Number of columns on the board
+
+    Returns:
+        Tuple indexed by cell; each item is a tuple of
+        (direction, neighbour index, segment is in h_bits, segment bit) for every
+        neighbour on the board. The step is blocked when that bit is set in
+        h_bits (segment is in h_bits) or v_bits (otherwise).
+    """
+    table = []
+    for index in range(rows * columns):
+        row, column = divmod(index, columns)
+        steps = []
+        if row > 0:
+            steps.append((UP, index - columns, True, 1 << (index - columns)))
+        if row < rows - 1:
+            steps.append((DOWN, index + columns, True, 1 << index))
+        if column > 0:
+            steps.append((LEFT, index - 1, False, 1 << (index - 1)))
+        if column < columns - 1:
+            steps.append((RIGHT, index + 1, False, 1 << index))
+        table.append(tuple(steps))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def cell_positions(rows, columns):
+    """Tuple mapping every cell index to its (row, col) tuple."""
+    return tuple(divmod(index, columns) for index in range(rows * columns))
+
+
+@lru_cache(maxsize=None)
+def pawn_move_table(rows, columns):
+    """
+    Precompute everything pawn move generation needs for a board size.
+
+    Extends neighbour_table: every step of a cell is
+        (direction, neighbour, in_h, bit, jump, diagonals)
+    where jump is (target, in_h, bit) of the straight jump over a pawn on the
+    neighbour (None at the board edge) and diagonals are the (target, in_h, bit)
+    fallbacks around it, in the order Board.get_valid_moves lists them.
+    A move is blocked when its bit is set in h_bits (in_h) or v_bits.
+    """
+    steps = neighbour_table(rows, columns)
+    table = []
+    for cell_steps in steps:
+        entries = []
+        for direction, neighbour, in_h, bit in cell_steps:
+            jump = None
+            diagonals = []
+            for beyond_direction, target, beyond_in_h, beyond_bit in steps[neighbour]:
+                if beyond_direction == direction:
+                    jump = (target, beyond_in_h, beyond_bit)
+                elif (beyond_direction in (LEFT, RIGHT)) == (direction in (UP, DOWN)):
+                    diagonals.append((target, beyond_in_h, beyond_bit))
+            entries.append((direction, neighbour, in_h, bit, jump, tuple(diagonals)))
+        table.append(tuple(entries))
+    return tuple(table)
@@ -1,15 +1,21 @@
 import random
 import pathfinding
+import bitboard
+import zobrist
+from wall_components import WallComponents
+
+PAWN_MOVE_CODE = 0
+WALL_MOVE_CODE = 1
+
 class Board:
 
     def __init__(self, game_state=None, player1=None, player2=None, rows=9, columns=9, ):
         self.rows = rows
         self.columns = columns
 
-        self.game_board = [['0' for _ in range(columns)] for _ in range(rows)]
-
-        self.h_walls = [[False for _ in range(columns)] for _ in range(rows)]  # False = no wall exists
-        self.v_walls = [[False for _ in range(columns)] for _ in range(rows)]  # False = no wall exists
+        # Wall segments packed one bit per cell (see bitboard.py), 0 = no wall exists
+        self.h_bits = 0
+        self.v_bits = 0
 
         self.player2 = player2
         self.player1 = player1
@@ -18,6 +24,47 @@ class Board:
 
         self.game_state = game_state
 
+        # Incrementally maintained Zobrist keys: whole position and walls only
+        self.zobrist_key = 0
+        self.wall_key = 0
+        self.rehash()
+
+        # Player number -> ((h_bits, v_bits, pawn position), path segment masks), see path_edges
+        self._path_edges = {}
+
+        # Wall structures kept in step with add_wall / remove_wall through the undo log
+        # in _wall_marks:
+        # - wall_components: union-find over wall end points
+        # - _distance_fields: goal row -> (undo log depth when created, distance field, BFS layers)
+        # _tracked_wall_bits are the walls they reflect; walls set any other way
+        # (setters, Position copies) trigger a rebuild on next use.
+        self.wall_components = WallComponents(rows, columns)
+        self._distance_fields = {}
+        self._tracked_wall_bits = (0, 0)
+        self._wall_marks = []
+
+    @property
+    def game_board(self):
+        return [['0' for _ in range(self.columns)] for _ in range(self.rows)]
+
+    @property
+    def h_walls(self):
+        return bitboard.bits_to_grid(self.h_bits, self.rows, self.columns)
+
+    @h_walls.setter
+    def h_walls(self, h_walls):
+        self.h_bits = bitboard.grid_to_bits(h_walls, self.columns)
+        self.rehash()
+
+    @property
+    def v_walls(self):
+        return bitboard.bits_to_grid(self.v_bits, self.rows, self.columns)
+
+    @v_walls.setter
+    def v_walls(self, v_walls):
+        self.v_bits = bitboard.grid_to_bits(v_walls, self.columns)
+        self.rehash()
+
     def get_game_board(self):
         return self.game_board
 
@@ -42,6 +89,12 @@ class Board:
     def get_current_turn(self):
         return self.current_turn
 
+    def get_hash(self):
+        return self.zobrist_key
+
+    def get_wall_hash(self):
+        return self.wall_key
+
     def set_h_walls(self, h_walls):
         self.h_walls = h_walls
 
@@ -50,13 +103,136 @@ class Board:
 
     def set_player1(self, player1):
         self.player1 = player1
+        self.rehash()
 
     def set_player2(self, player2):
         self.player2 = player2
+        self.rehash()
 
     def set_current_turn(self, turn):
+        turn_keys = zobrist.zobrist_tables(self.rows, self.columns)['turn']
+        self.zobrist_key ^= turn_keys[self.current_turn] ^ turn_keys[turn]
         self.current_turn = turn
 
+    #####################HASHING#####################
+
+    def compute_hash(self):
+        # Full Zobrist key from scratch, used to (re)initialise and to verify the incremental key
+        tables = zobrist.zobrist_tables(self.rows, self.columns)
+        key = tables['turn'][self.current_turn] ^ zobrist.wall_hash(self.h_bits, self.v_bits, self.rows, self.columns)
+
+        for index, player in enumerate((self.player1, self.player2)):
+            if player is None:
+                continue
+            key ^= tables['pawn'][index][bitboard.cell_index(player.get_position(), self.columns)]
+            key ^= tables['walls'][index][player.get_number_of_walls()]
+
+        return key
+
+    def rehash(self):
+        self.wall_key = zobrist.wall_hash(self.h_bits, self.v_bits, self.rows, self.columns)
+        self.zobrist_key = self.compute_hash()
+
+    def add_wall(self, orientation, row, column):
+        # Sets the wall bits (no legality check) and keeps the keys and wall structures in sync
+        synced = self._tracked_wall_bits == (self.h_bits, self.v_bits)
+        wall = self.wall_mask(orientation, row, column)
+        if orientation == 'h':
+            self.h_bits |= wall
+        else:
+            self.v_bits |= wall
+        self._hash_wall(orientation, row, column)
+
+        if synced:
+            mark = self.wall_components.add_wall(orientation, row, column)
+            blocked_edges = self.wall_edges(orientation, row, column)
+            field_changes = [(field, layers,
+                              pathfinding.update_distance_field(self, goal_row, field, layers, blocked_edges))
+                             for goal_row, (_, field, layers) in self._distance_fields.items()]
+            self._wall_marks.append(((orientation, row, column), mark, field_changes))
+            self._tracked_wall_bits = (self.h_bits, self.v_bits)
+
+    def remove_wall(self, orientation, row, column):
+        synced = (self._tracked_wall_bits == (self.h_bits, self.v_bits)
+                  and self._wall_marks and self._wall_marks[-1][0] == (orientation, row, column))
+        wall = self.wall_mask(orientation, row, column)
+        if orientation == 'h':
+            self.h_bits &= ~wall
+        else:
+            self.v_bits &= ~wall
+        self._hash_wall(orientation, row, column)
+
+        # Only the most recent wall can be undone, anything else is rebuilt when next needed
+        if synced:
+            _, mark, field_changes = self._wall_marks.pop()
+            self.wall_components.undo(mark)
+            for field, layers, undo_record in field_changes:
+                pathfinding.restore_distance_field(field, layers, undo_record)
+
+            # Fields created after this wall was added never saw the walls without it
+            depth = len(self._wall_marks)
+            for goal_row in [goal for goal, (created, _, _) in self._distance_fields.items() if created > depth]:
+                del self._distance_fields[goal_row]
+            self._tracked_wall_bits = (self.h_bits, self.v_bits)
+
+    def _sync_wall_tracking(self):
+        if self._tracked_wall_bits != (self.h_bits, self.v_bits):
+            self.wall_components.rebuild(self.h_bits, self.v_bits)
+            self._distance_fields = {}
+            self._tracked_wall_bits = (self.h_bits, self.v_bits)
+            self._wall_marks = []
+
+    def wall_closes_loop(self, orientation, row, column):
+        # False means the wall touches no loop of walls/border and cannot block any path
+        self._sync_wall_tracking()
+        return self.wall_components.closes_loop(orientation, row, column)
+
+    def get_distance_field(self, goal_row):
+        # Distance of every cell to goal_row (see pathfinding.distance_field); updated in
+        # place by add_wall / remove_wall, so it must not be modified by the caller
+        return self._distance_entry(goal_row)[1]
+
+    def get_distance_layers(self, goal_row):
+        # BFS layers of get_distance_field: layers[d] is the bitboard of cells at distance d
+        return self._distance_entry(goal_row)[2]
+
+    def _distance_entry(self, goal_row):
+        self._sync_wall_tracking()
+        entry = self._distance_fields.get(goal_row)
+        if entry is None:
+            field, layers = pathfinding.distance_layers(self, goal_row)
+            entry = (len(self._wall_marks), list(field), list(layers))
+            self._distance_fields[goal_row] = entry
+        return entry
+
+    def wall_edges(self, orientation, row, column):
+        # The two (cell, cell) index pairs a wall anchored at (row, column) separates
+        index = row * self.columns + column
+        if orientation == 'h':
+            return ((index, index + self.columns), (index + 1, index + 1 + self.columns))
+        return ((index, index + 1), (index + self.columns, index + self.columns + 1))
+
+    def _hash_wall(self, orientation, row, column):
+        segment_keys = zobrist.zobrist_tables(self.rows, self.columns)[orientation]
+        index = row * self.columns + column
+        if orientation == 'h':
+            key = segment_keys[index] ^ segment_keys[index + 1]
+        else:
+            key = segment_keys[index] ^ segment_keys[index + self.columns]
+        self.wall_key ^= key
+        self.zobrist_key ^= key
+
+    def _set_player_position(self, player, new_player_pos):
+        pawn_keys = zobrist.zobrist_tables(self.rows, self.columns)['pawn'][0 if player is self.player1 else 1]
+        self.zobrist_key ^= (pawn_keys[bitboard.cell_index(player.get_position(), self.columns)]
+                             ^ pawn_keys[bitboard.cell_index(new_player_pos, self.columns)])
+        player.set_position(new_player_pos)
+
+    def _set_number_of_walls(self, player, number_of_walls):
+        wall_keys = zobrist.zobrist_tables(self.rows, self.columns)['walls'][0 if player is self.player1 else 1]
+        self.zobrist_key ^= wall_keys[player.get_number_of_walls()] ^ wall_keys[number_of_walls]
+        player.set_number_of_walls(number_of_walls)
+
     #####################MAIN LOGIC#####################
 
     ############Wall placement logic###########
@@ -67,70 +243,139 @@ class Board:
 
         # Moving up
         if new_row == old_row - 1:
-            return self.h_walls[new_row][old_column]
+            return bool(self.h_bits >> (new_row * self.columns + old_column) & 1)
 
         # Moving down
         if new_row == old_row + 1:
-            return self.h_walls[old_row][old_column]
+            return bool(self.h_bits >> (old_row * self.columns + old_column) & 1)
 
         # Moving left
         if new_column == old_column - 1:
-            return self.v_walls[old_row][new_column]
+            return bool(self.v_bits >> (old_row * self.columns + new_column) & 1)
 
         # Moving right
         if new_column == old_column + 1:
-            return self.v_walls[old_row][old_column]
+            return bool(self.v_bits >> (old_row * self.columns + old_column) & 1)
 
         return False
 
+    def wall_mask(self, orientation, row, column):
+        # The two segments covered by a wall anchored at (row, column)
+        index = row * self.columns + column
+        if orientation == 'h':
+            return (1 << index) | (1 << (index + 1))
+        return (1 << index) | (1 << (index + self.columns))
+
     def can_place_horizontal_wall(self, row, column):
-        if not self.is_inside_board((row, column)):
+        if not self.is_inside_board((row, column)) or not self.is_inside_board((row + 1, column + 1)):
             return False
 
-        if self.h_walls[row][column] or self.h_walls[row][column + 1]:
+        index = row * self.columns + column
+        wall = self.wall_mask('h', row, column)
+        if self.h_bits & wall:
             return False
 
-        if self.v_walls[row][column] and (self.h_walls[row+1][column] == True):
+        if self.v_bits >> index & 1 and self.h_bits >> (index + self.columns) & 1:
             return False
 
-        self.h_walls[row][column] = True
-        self.h_walls[row][column+1] = True
-
-        player1_can_reach = pathfinding.has_valid_path(self, self.get_player1_pos(), 0)
-        player2_can_reach = pathfinding.has_valid_path(self, self.get_player2_pos(), self.rows - 1)
-
-        self.h_walls[row][column] = False
-        self.h_walls[row][column + 1] = False
-
-        if not player1_can_reach or not player2_can_reach:
-            return False
+        if not self.wall_closes_loop('h', row, column):
+            return True
 
-        return True
+        return self._keeps_paths_open('h', wall)
 
     def can_place_vertical_wall(self, row, column):
-        if not self.is_inside_board((row, column)):
+        if not self.is_inside_board((row, column)) or not self.is_inside_board((row + 1, column + 1)):
             return False
 
-        if self.v_walls[row][column] or self.v_walls[row + 1][column]:
+        index = row * self.columns + column
+        wall = self.wall_mask('v', row, column)
+        if self.v_bits & wall:
             return False
 
-        if self.h_walls[row][column] and (self.h_walls[row][column+1] == True):
+        if self.h_bits >> index & 1 and self.h_bits >> (index + 1) & 1:
             return False
 
-        self.v_walls[row][column] = True
-        self.v_walls[row+1][column] = True
+        if not self.wall_closes_loop('v', row, column):
+            return True
 
-        player1_can_reach = pathfinding.has_valid_path(self, self.get_player1_pos(), 0)
-        player2_can_reach = pathfinding.has_valid_path(self, self.get_player2_pos(), self.rows - 1)
+        return self._keeps_paths_open('v', wall)
 
-        self.v_walls[row][column] = False
-        self.v_walls[row + 1][column] = False
+    def _keeps_paths_open(self, orientation, wall):
+        # A wall that cuts no edge of a player's cached shortest path leaves that path
+        # intact, so the BFS only runs for the players whose path the wall cuts
+        player1_cut = self.wall_cuts_path(1, orientation, wall)
+        player2_cut = self.wall_cuts_path(2, orientation, wall)
+        if not player1_cut and not player2_cut:
+            return True
 
-        if not player1_can_reach or not player2_can_reach:
-            return False
+        if orientation == 'h':
+            self.h_bits |= wall
+        else:
+            self.v_bits |= wall
 
-        return True
+        player1_can_reach = not player1_cut or pathfinding.has_valid_path(self, self.get_player1_pos(), 0)
+        player2_can_reach = not player2_cut or pathfinding.has_valid_path(self, self.get_player2_pos(), self.rows - 1)
 
+        if orientation == 'h':
+            self.h_bits &= ~wall
+        else:
+            self.v_bits &= ~wall
+
+        return player1_can_reach and player2_can_reach
+
+    def path_edges(self, player_number):
+        # (h, v) segment masks of one shortest path to the player's goal row, or None if
+        # there is no path; recomputed only after the walls or the pawn have changed
+        player, goal_row = (self.player1, 0) if player_number == 1 else (self.player2, self.rows - 1)
+        position = player.get_position()
+        state = (self.h_bits, self.v_bits, position)
+
+        cached = self._path_edges.get(player_number)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        edges = None
+        path = pathfinding.shortest_path(self, position, goal_row)
+        if path is not None:
+            h_edges = v_edges = 0
+            for (row1, column1), (row2, column2) in zip(path, path[1:]):
+                index = min(row1, row2) * self.columns + min(column1, column2)
+                if column1 == column2:
+                    h_edges |= 1 << index
+                else:
+                    v_edges |= 1 << index
+            edges = (h_edges, v_edges)
+
+        self._path_edges[player_number] = (state, edges)
+        return edges
+
+    def path_cutting_walls(self, player_number):
+        # (h, v) sets of anchor indices (row * columns + column) of the wall slots that cut
+        # the player's cached shortest path, or None if there is no path
+        edges = self.path_edges(player_number)
+        if edges is None:
+            return None
+        h_edges, v_edges = edges
+        h_slots, v_slots = set(), set()
+        for index in range(self.rows * self.columns):
+            column = index % self.columns
+            if h_edges >> index & 1:
+                if column < self.columns - 1:
+                    h_slots.add(index)
+                if column > 0:
+                    h_slots.add(index - 1)
+            if v_edges >> index & 1:
+                if index < (self.rows - 1) * self.columns:
+                    v_slots.add(index)
+                if index >= self.columns:
+                    v_slots.add(index - self.columns)
+        return h_slots, v_slots
+
+    def wall_cuts_path(self, player_number, orientation, wall):
+        edges = self.path_edges(player_number)
+        if edges is None:
+            return True
+        return bool(wall & edges[0 if orientation == 'h' else 1])
 
     def place_wall(self, orientation, row, column):
 
@@ -138,14 +383,12 @@ class Board:
 
         if orientation == 'h':
             if self.can_place_horizontal_wall(row, column):
-                self.h_walls[row][column] = True
-                self.h_walls[row][column + 1] = True
+                self.add_wall('h', row, column)
                 state = True
 
         elif orientation == 'v':
             if self.can_place_vertical_wall(row, column):
-                self.v_walls[row][column] = True
-                self.v_walls[row + 1][column] = True
+                self.add_wall('v', row, column)
                 state = True
 
         if state:
@@ -153,60 +396,80 @@ class Board:
                 if self.player1.get_number_of_walls() <= 0:
                     return False
                 else:
-                    self.player1.set_number_of_walls(self.player1.get_number_of_walls() - 1)
+                    self._set_number_of_walls(self.player1, self.player1.get_number_of_walls() - 1)
             elif self.get_current_turn() == 2:
                 if self.player2.get_number_of_walls() <= 0:
                     return False
                 else:
-                    self.player2.set_number_of_walls(self.player2.get_number_of_walls() - 1)
+                    self._set_number_of_walls(self.player2, self.player2.get_number_of_walls() - 1)
 
-        self.game_state.save_state(self)
+        self.record_state()
 
         if state:
             return True
 
         return False
 
+    ############Search moves (make / unmake)###########
+
+    def make_move(self, move):
+        # Applies a move produced by the move generator in place: no validation,
+        # no history snapshot. Returns the token that unmake_move needs to restore it.
+        player = self.get_current_player()
+        undo_token = (move, self.current_turn, player.get_position(), self.zobrist_key, self.wall_key)
+
+        if move[0] == PAWN_MOVE_CODE:
+            self._set_player_position(player, tuple(move[1]))
+        else:
+            row, column = move[1]
+            self.add_wall(move[2], row, column)
+            self._set_number_of_walls(player, player.get_number_of_walls() - 1)
+
+        self.update_turn()
+        return undo_token
+
+    def unmake_move(self, undo_token):
+        move, turn, old_position, zobrist_key, wall_key = undo_token
+        self.current_turn = turn
+        player = self.get_current_player()
+
+        if move[0] == PAWN_MOVE_CODE:
+            player.set_position(old_position)
+        else:
+            row, column = move[1]
+            self.remove_wall(move[2], row, column)
+            player.set_number_of_walls(player.get_number_of_walls() + 1)
+
+        self.zobrist_key = zobrist_key
+        self.wall_key = wall_key
+
     ##################################################
     ############Movement logic###########
 
     def get_valid_moves(self, player_pos, opponent_pos):
+        # Steps, jumps and diagonal fallbacks come from tables precomputed per board
+        # size (bitboard.pawn_move_table); each move is one bit test on the walls
+        columns = self.columns
+        positions = bitboard.cell_positions(self.rows, columns)
+        steps = bitboard.pawn_move_table(self.rows, columns)[player_pos[0] * columns + player_pos[1]]
+        opponent = opponent_pos[0] * columns + opponent_pos[1]
+        h_bits, v_bits = self.h_bits, self.v_bits
         valid_moves = []
 
-        directions = {
-            "up": (-1, 0),
-            "down": (1, 0),
-            "left": (0, -1),
-            "right": (0, 1)
-        }
-
-        for distance_row, distance_column in directions.values():
-            adjacent = (player_pos[0] + distance_row, player_pos[1] + distance_column)
-
-            if not self.is_inside_board(adjacent):
-                continue
-
-            if self.is_wall_between(player_pos, adjacent):
+        for _, neighbour, in_h, bit, jump, diagonals in steps:
+            if (h_bits if in_h else v_bits) & bit:
                 continue
 
-            if adjacent != opponent_pos:
-                valid_moves.append(adjacent)
+            if neighbour != opponent:
+                valid_moves.append(positions[neighbour])
                 continue
 
-            jump = (adjacent[0] + distance_row, adjacent[1] + distance_column)
-
-            if self.is_inside_board(jump) and not self.is_wall_between(adjacent, jump):
-                valid_moves.append(jump)
+            if jump is not None and not (h_bits if jump[1] else v_bits) & jump[2]:
+                valid_moves.append(positions[jump[0]])
             else:
-                if distance_row != 0:  # moving up/down → diagonals left/right
-                    diagonals = [(adjacent[0], adjacent[1] - 1), (adjacent[0], adjacent[1] + 1)]
-                else:  # moving left/right → diagonals up/down
-                    diagonals = [(adjacent[0] - 1, adjacent[1]), (adjacent[0] + 1, adjacent[1])]
-
-                for diagonal in diagonals:
-                    if (self.is_inside_board(diagonal)
-                            and not self.is_wall_between(adjacent, diagonal)):
-                        valid_moves.append(diagonal)
+                for target, diagonal_in_h, diagonal_bit in diagonals:
+                    if not (h_bits if diagonal_in_h else v_bits) & diagonal_bit:
+                        valid_moves.append(positions[target])
 
         return valid_moves
 
@@ -215,9 +478,9 @@ class Board:
 
     def update_turn(self):
         if self.current_turn == 1:
-            self.current_turn = 2
+            self.set_current_turn(2)
         else:
-            self.current_turn = 1
+            self.set_current_turn(1)
 
     def get_current_player(self):
         if self.current_turn == 1:
@@ -231,11 +494,15 @@ class Board:
 
     def update_player_position(self, player, new_player_pos):
         if player.get_symbol() == self.player1.get_symbol():
-            self.player1.set_position(new_player_pos)
+            self._set_player_position(self.player1, new_player_pos)
         else:
-            self.player2.set_position(new_player_pos)
+            self._set_player_position(self.player2, new_player_pos)
 
         self.update_turn()
+        return self.record_state()
+
+    def record_state(self):
+        # Pushes a snapshot to the undo history and returns whether the game is over
         return self.game_state.save_state(self)
 
     def set_game_state(self, game_state):
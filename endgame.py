@@ -0,0 +1,247 @@
+"""
+Exact endgame for Quoridor.
+Once nobody can place a wall the game is a pawn race on a fixed wall layout.
+A race position is (player 1 square, player 2 square, side to move), few
+enough (2 * 81 * 81 on a 9x9 board) to solve all of them at once by retrograde
+analysis, jumps and diagonal moves around the opponent included. Solved tables
+are cached per wall layout, so the rest of the game only looks moves up.
+
+With walls left on one side only the race still decides some positions: a
+player who wins the race without ever placing a wall wins whatever the opponent
+(who has no walls) does.
+"""
+
+from collections import OrderedDict, deque, namedtuple
+
+import bitboard
+from board import PAWN_MOVE_CODE
+
+# Race outcomes for the side to move
+WIN = 1
+LOSS = -1
+DRAW = 0  # neither side can force a win, the pawns block each other forever
+
+# Solved race tables kept per wall layout, see race_table. Shared by the AI
+# worker's searches and pondering, with the same care as the caches in pathfinding.py
+RACE_CACHE_SIZE = 16
+_race_cache = OrderedDict()
+_race_hits = 0
+_race_misses = 0
+
+# Solution of a race position: the optimal move, the outcome for the side to
+# move (WIN, LOSS or DRAW) and the number of plies until the game ends (None for DRAW)
+EndgameResult = namedtuple('EndgameResult', ['move', 'outcome', 'plies'])
+
+
+def solve_endgame(board):
+    """
+    Provably optimal move for the side to move, if the position is a solved endgame.
+
+    Solved regimes:
+    - no walls left on either side: the race table decides every position;
+    - walls left on one side only: solved when the side to move holds the walls
+      and wins the race without using them.
+
+    Args:
+        board: Board object containing game state
+
+    Returns:
+        EndgameResult, or None if the position is not solved and needs a search
+    """
+    turn = board.get_current_turn()
+    player1_walls = board.get_player1().get_number_of_walls()
+    player2_walls = board.get_player2().get_number_of_walls()
+    if player1_walls > 0 and player2_walls > 0:
+        return None
+
+    result = best_race_move(board)
+    if result is None:
+        return None
+    if player1_walls == 0 and player2_walls == 0:
+        return result
+
+    # One side has walls: only a race the wall holder wins on its own turn is proven
+    holder = 1 if player1_walls > 0 else 2
+    if turn == holder and result.outcome == WIN:
+        return result
+    return None
+
+
+def best_race_move(board):
+    """
+    Optimal pawn move of the race from board's position, ignoring walls still in hand.
+
+    Wins are taken by the fastest route, losses are dragged out as long as
+    possible and a draw is kept when no win exists.
+
+    Returns:
+        EndgameResult, or None if the side to move has no pawn move
+    """
+    rows, columns = board.rows, board.columns
+    cells = rows * columns
+    outcome, plies = race_table(board)
+    turn = board.get_current_turn()
+    player1 = bitboard.cell_index(board.get_player1_pos(), columns)
+    player2 = bitboard.cell_index(board.get_player2_pos(), columns)
+    mover, opponent = (player1, player2) if turn == 1 else (player2, player1)
+
+    best = None
+    best_rank = None
+    for target in _pawn_targets(bitboard.pawn_move_table(rows, columns)[mover], board.h_bits, board.v_bits,
+                                opponent):
+        if turn == 1:
+            child = _state(2, target, player2, cells)
+        else:
+            child = _state(1, player1, target, cells)
+
+        # Outcomes are stored for the side to move in the child, i.e. the opponent
+        if outcome[child] == LOSS:
+            rank = (2, -plies[child])
+            result = (WIN, plies[child] + 1)
+        elif outcome[child] == DRAW:
+            rank = (1, 0)
+            result = (DRAW, None)
+        else:
+            rank = (0, plies[child])
+            result = (LOSS, plies[child] + 1)
+
+        if best_rank is None or rank > best_rank:
+            best_rank = rank
+            best = EndgameResult((PAWN_MOVE_CODE, bitboard.cell_position(target, columns)), *result)
+
+    return best
+
+
+def race_table(board):
+    """
+    Solved race for board's wall layout, from the LRU cache or solve_race.
+
+    Returns:
+        (outcome, plies) lists indexed by race state (see _state)
+    """
+    global _race_hits, _race_misses
+    key = (board.rows, board.columns, board.h_bits, board.v_bits)
+    table = _race_cache.get(key)
+    if table is not None:
+        _race_hits += 1
+        try:
+            _race_cache.move_to_end(key)
+        except KeyError:
+            _race_cache[key] = table  # evicted by another thread since the lookup
+        return table
+
+    _race_misses += 1
+    table = solve_race(*key)
+    _race_cache[key] = table
+    while len(_race_cache) > RACE_CACHE_SIZE:
+        try:
+            _race_cache.popitem(last=False)
+        except KeyError:
+            break  # emptied by another thread
+    return table
+
+
+def solve_race(rows, columns, h_bits, v_bits):
+    """
+    Retrograde analysis of every race position for one wall layout.
+
+    Positions where a pawn stands on its goal row are lost for the side to move.
+    Working backwards in order of distance from the end: a position with a move
+    into a lost position is won, and a position whose moves all lead to won
+    positions is lost. Positions never reached this way are draws.
+
+    Returns:
+        (outcome, plies): per state the outcome for the side to move (WIN, LOSS,
+        DRAW) and the number of plies until the game ends with best play
+    """
+    cells = rows * columns
+    table = bitboard.pawn_move_table(rows, columns)
+    goal_first = (rows - 1) * columns  # first cell of player 2's goal row
+
+    size = 2 * cells * cells
+    outcome = [DRAW] * size
+    plies = [0] * size
+    remaining = [0] * size
+    predecessors = [[] for _ in range(size)]
+    queue = deque()
+
+    for turn in (1, 2):
+        for player1 in range(cells):
+            for player2 in range(cells):
+                if player1 == player2:
+                    continue
+                state = _state(turn, player1, player2, cells)
+                if player1 < columns or player2 >= goal_first:
+                    # The previous move ended the game
+                    outcome[state] = LOSS
+                    queue.append(state)
+                    continue
+
+                if turn == 1:
+                    children = [_state(2, target, player2, cells)
+                                for target in _pawn_targets(table[player1], h_bits, v_bits, player2)]
+                else:
+                    children = [_state(1, player1, target, cells)
+                                for target in _pawn_targets(table[player2], h_bits, v_bits, player1)]
+                remaining[state] = len(children)
+                for child in children:
+                    predecessors[child].append(state)
+
+    while queue:
+        state = queue.popleft()
+        lost = outcome[state] == LOSS
+        for parent in predecessors[state]:
+            if outcome[parent] != DRAW or remaining[parent] == 0:
+                continue
+            if lost:
+                outcome[parent] = WIN
+            else:
+                remaining[parent] -= 1
+                if remaining[parent]:
+                    continue
+                outcome[parent] = LOSS
+            remaining[parent] = 0
+            plies[parent] = plies[state] + 1
+            queue.append(parent)
+
+    return outcome, plies
+
+
+def get_endgame_stats():
+    """Hit/miss counters and size of the race table cache"""
+    lookups = _race_hits + _race_misses
+    return {
+        'hits': _race_hits,
+        'misses': _race_misses,
+        'hit_rate': _race_hits / lookups if lookups else 0.0,
+        'entries': len(_race_cache),
+    }
+
+
+def clear_endgame_cache():
+    global _race_hits, _race_misses
+    _race_cache.clear()
+    _race_hits = 0
+    _race_misses = 0
+
+
+def _state(turn, player1, player2, cells):
+    # Index of a race position in the tables of solve_race
+    return ((turn - 1) * cells + player1) * cells + player2
+
+
+def _pawn_targets(steps, h_bits, v_bits, opponent):
+    # Pawn moves from one cell (its bitboard.pawn_move_table entry), same rules as Board.get_valid_moves
+    targets = []
+    for _, neighbour, in_h, bit, jump, diagonals in steps:
+        if (h_bits if in_h else v_bits) & bit:
+            continue
+        if neighbour != opponent:
+            targets.append(neighbour)
+        elif jump is not None and not (h_bits if jump[1] else v_bits) & jump[2]:
+            targets.append(jump[0])
+        else:
+            for target, target_in_h, target_bit in diagonals:
+                if not (h_bits if target_in_h else v_bits) & target_bit:
+                    targets.append(target)
+    return targets
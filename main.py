@@ -2,7 +2,9 @@ import pygame
 import json
 from game_state import GameState
 import pathfinding
-from AIPlayer import AIPlayer
+from AIPlayer import create_ai_player
+from ai_worker import AIWorker
+from wall_legality import wall_legality_mask
 from widgets import Button, CircleButton
 from game_state import GameState
 WIDTH, HEIGHT = 800, 600
@@ -34,6 +36,9 @@ WALL_THICKNESS = 8
 WALL_COLOR = (139, 69, 19)
 HOVER_COLOR = (180, 120, 80)
 
+# Seconds the AI thinks per move; the hard level deepens its search until they run out
+AI_TIME_BUDGET = 2.0
+
 pygame.init()
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Quoridor")
@@ -264,6 +269,21 @@ def wall_overlaps(row, col, orientation, walls):
 
 
 
+# (position hash, legality mask of every wall slot) for the wall preview
+wall_legality_cache = None
+def wall_preview_is_legal(board, row, col):
+    # Mouse coordinates as returned by get_wall_from_mouse; the mask is only
+    # recomputed when the position changes, not every frame
+    global wall_legality_cache
+    key = board.get_hash()
+    if wall_legality_cache is None or wall_legality_cache[0] != key:
+        wall_legality_cache = (key, wall_legality_mask(board))
+    h_legal, v_legal = wall_legality_cache[1]
+    if wall_orientation == "H":
+        return bool(h_legal[row - 1][col])
+    return bool(v_legal[row][col - 1])
+
+
 gap = 5
 def draw_wall_preview(surface, row, col):
     if wall_orientation == "H":
@@ -385,6 +405,12 @@ def print_text(surface):
     text_rect = text_surf.get_rect(center=(WIDTH // 2, HEIGHT - 30))
     surface.blit(text_surf, text_rect)
 
+def print_thinking(surface):
+    dots = "." * (pygame.time.get_ticks() // 400 % 3 + 1)
+    text_surf = wall_font.render("AI is thinking" + dots, True, AI_COLOR)
+    text_rect = text_surf.get_rect(midtop=(WIDTH // 2, 75))
+    surface.blit(text_surf, text_rect)
+
 def main():
 
     global placing_wall, wall_orientation, walls, no_walls_player
@@ -401,6 +427,9 @@ def main():
     no_walls_ai = 10
     ai_move = ()
     ai_player = None
+    ai_worker = None   # runs the AI search in the background
+    ai_handle = None   # pending AI move, polled once per frame
+    ponder_handle = None   # background search on the human's time
     message_start_time = None
     is_saved = False
 
@@ -409,6 +438,10 @@ def main():
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if ai_worker is not None:
+                    ai_worker.cancel()
+                    ai_handle = None
+                    ponder_handle = None
                 run = False
                 break
 
@@ -448,28 +481,30 @@ def main():
             elif state=="continue_game":
                 active_board  = game_state.load_game() ##loaded gamed need to be used
 
-                rows = len(active_board.h_walls)
-                cols = len(active_board.h_walls[0])
+                h_walls = active_board.get_h_walls()
+                rows = len(h_walls)
+                cols = len(h_walls[0])
 
                 for r in range(rows):
                     col = 0
                     for c in range(cols):
-                        is_wall = active_board.h_walls[r][c]
+                        is_wall = h_walls[r][c]
                         if is_wall:
-                            if not active_board.h_walls[r][c-1] or (c - col) == 2:
+                            if not h_walls[r][c-1] or (c - col) == 2:
                                 walls.append((r+1, c, 'H'))
                                 col = c
 
 
-                rows = len(active_board.v_walls)
-                cols = len(active_board.v_walls[0])
+                v_walls = active_board.get_v_walls()
+                rows = len(v_walls)
+                cols = len(v_walls[0])
 
                 for c in range(cols):
                     row = 0
                     for r in range(rows):
-                        is_wall = active_board.v_walls[r][c]
+                        is_wall = v_walls[r][c]
                         if is_wall:
-                            if not active_board.v_walls[r-1][c] or (r - row) == 2:
+                            if not v_walls[r-1][c] or (r - row) == 2:
                                 walls.append((r, c+1, 'V'))
                                 row = r
                             pass
@@ -479,7 +514,7 @@ def main():
 
                 if active_board.get_player2().get_name() == 'ai':
                     state="vs_ai"
-                    ai_player = AIPlayer(active_board, 2, 8, game_state.difficulty)
+                    ai_player = create_ai_player(active_board, 2, 8, game_state.difficulty)
                 else:
                     state="vs_human"
 
@@ -592,27 +627,18 @@ def main():
                                     error = True
             elif state=="vs_ai":
                 if save_button.handle_event(event):
+                    # Stop thinking while saving, the search restarts on the next frame
+                    if ai_worker is not None:
+                        ai_worker.cancel()
+                        ai_handle = None
+                        ponder_handle = None
                     game_state.save_game(game_state.board)
                     is_saved = True
                     message_start_time = pygame.time.get_ticks()
 
                 if game_state.board.get_current_player().get_name() == 'ai':
-                   ai_move =  ai_player.ai_move()
-                   if ai_move[0] == 1:
-                       placing_wall = True
-                       wall_owner = "AI"
-                       pos = ai_move[1]
-                       wall_orientation = ai_move[2].upper()
-                       if(wall_orientation == 'H'):
-                            walls.append((pos[0]+1, pos[1], wall_orientation))
-                       else:
-                            walls.append((pos[0], pos[1]+1, wall_orientation))
-                       no_walls_ai -=1
-                       placing_wall = False
-                   else:
-                       placing_wall = False
-                   game_state.save_state(active_board)
-
+                    # The AI move is started and collected in the frame loop below
+                    continue
 
                 else:
                     if event.type == pygame.MOUSEBUTTONDOWN:
@@ -688,7 +714,7 @@ def main():
                     state = "vs_ai"
                     game_state.board.player2.name = 'ai'
                     active_board = game_state.board
-                    ai_player = AIPlayer(board, 2, 8, game_state.difficulty)
+                    ai_player = create_ai_player(board, 2, 8, game_state.difficulty)
                     cell_buttons.clear()
                     for row in range(BOARD_SIZE):
                         for col in range(BOARD_SIZE):
@@ -709,7 +735,7 @@ def main():
                     state = "vs_ai"
                     game_state.board.player2.name = 'ai'
                     active_board = game_state.board
-                    ai_player = AIPlayer(board, 2, 8, game_state.difficulty)
+                    ai_player = create_ai_player(board, 2, 8, game_state.difficulty)
                     cell_buttons.clear()
                     for row in range(BOARD_SIZE):
                         for col in range(BOARD_SIZE):
@@ -730,7 +756,7 @@ def main():
                     state = "vs_ai"
                     game_state.board.player2.name = 'ai'
                     active_board = game_state.board
-                    ai_player = AIPlayer(board, 2, 8, game_state.difficulty)
+                    ai_player = create_ai_player(board, 2, 8, game_state.difficulty)
                     cell_buttons.clear()
                     for row in range(BOARD_SIZE):
                         for col in range(BOARD_SIZE):
@@ -862,7 +888,8 @@ def main():
 
                     if pos:
                         r, c = pos
-                        if (wall_orientation == "H" and r != 0) or (wall_orientation == "V" and c != 0):
+                        if ((wall_orientation == "H" and r != 0) or (wall_orientation == "V" and c != 0)) \
+                                and wall_preview_is_legal(game_state.board, r, c):
                             draw_wall_preview(WIN, *pos)
 
             if error:
@@ -871,6 +898,9 @@ def main():
             if game_state.is_game_over:
                 print_winner(WIN, game_state.game_winner)
 
+            if ai_handle is not None:
+                print_thinking(WIN)
+
         elif state == "vs_human":
             WIN.fill((255, 255, 255))
             #draw navbar
@@ -969,7 +999,8 @@ def main():
 
                 if pos:
                     r, c = pos
-                    if (wall_orientation == "H" and r != 0) or (wall_orientation == "V" and c != 0):
+                    if ((wall_orientation == "H" and r != 0) or (wall_orientation == "V" and c != 0)) \
+                            and wall_preview_is_legal(game_state.board, r, c):
                         draw_wall_preview(WIN, *pos)
 
 
@@ -980,6 +1011,36 @@ def main():
             if game_state.is_game_over:
                 print_winner(WIN, game_state.game_winner)
 
+        # AI turn: think in the background and only poll the result here, so the window keeps redrawing
+        if run and state == "vs_ai" and ai_worker is None:
+            ai_worker = AIWorker(ai_player)
+
+        if run and state == "vs_ai" and not game_state.is_game_over \
+                and game_state.board.get_current_player().get_name() != 'ai':
+            # Human turn: ponder on the likely replies once per turn
+            if ponder_handle is None:
+                ponder_handle = ai_worker.ponder(game_state.board)
+
+        elif run and state == "vs_ai" and not game_state.is_game_over:
+            if ai_handle is None:
+                ai_handle = ai_worker.submit(game_state.board, time_budget=AI_TIME_BUDGET)
+                ponder_handle = None
+            elif ai_handle.done():
+                ai_move = ai_handle.result()
+                ai_handle = None
+                if ai_move:
+                    ai_player.apply_move(game_state.board, ai_move)
+                    if ai_move[0] == 1:
+                        pos = ai_move[1]
+                        ai_wall_orientation = ai_move[2].upper()
+                        if ai_wall_orientation == 'H':
+                            walls.append((pos[0]+1, pos[1], ai_wall_orientation))
+                        else:
+                            walls.append((pos[0], pos[1]+1, ai_wall_orientation))
+                        no_walls_ai -= 1
+                    placing_wall = False
+                    game_state.save_state(game_state.board)
+
         if is_saved:
             current_time = pygame.time.get_ticks()
             if current_time - message_start_time <= 2000:
@@ -994,6 +1055,8 @@ def main():
         pygame.display.flip()
         pygame.display.update()
 
+    if ai_worker is not None:
+        ai_worker.shutdown()
     pygame.quit()
     
 if __name__ == "__main__":
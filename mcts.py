@@ -0,0 +1,340 @@
+"""
+Monte Carlo Tree Search engine for Quoridor (difficulty 'mcts').
+UCT tree search where leaves are scored by short heuristic rollouts: pawns step
+along their shortest path to the goal and now and then a random legal wall is
+placed. The tree is kept between turns and re-rooted on the position reached
+after the opponent's reply.
+"""
+
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pathfinding
+from AIPlayer import AIPlayer
+from board import PAWN_MOVE_CODE, WALL_MOVE_CODE
+from position import Position
+
+# Rollout policy
+ROLLOUT_MAX_PLIES = 40
+ROLLOUT_WALL_PROBABILITY = 0.1
+
+DEFAULT_TIME_BUDGET = 2.0
+
+# Leaves selected per batch: in this process, and per worker task with parallel rollouts
+BATCH_SIZE = 8
+PARALLEL_BATCH_SIZE = 32
+
+# Parallel rollouts: batches each worker process has queued or running while
+# the tree search keeps selecting leaves
+BATCHES_PER_WORKER = 2
+
+
+class MCTSNode:
+    """One tree node; wins are counted for the player who made `move` (mover)"""
+
+    __slots__ = ('move', 'mover', 'parent', 'children', 'untried_moves', 'visits', 'wins', 'key')
+
+    def __init__(self, move=None, mover=None, parent=None, key=None):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        self.untried_moves = None  # Generated on first visit
+        self.visits = 0
+        self.wins = 0.0
+        self.key = key
+
+    def uct_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+
+def winner(board):
+    """1 or 2 if a pawn has reached its goal row, otherwise None"""
+    if board.get_player1_pos()[0] == 0:
+        return 1
+    if board.get_player2_pos()[0] == board.rows - 1:
+        return 2
+    return None
+
+
+def rollout(board, rng, max_plies=ROLLOUT_MAX_PLIES):
+    """
+    Play a heuristic game from board and return the winning player (1 or 2).
+
+    Each ply the side to move either tries one random wall (with probability
+    ROLLOUT_WALL_PROBABILITY) or steps to the neighbouring square closest to its
+    goal. If nobody has won after max_plies, the player that is closer to its goal
+    (the side to move wins ties) is declared the winner.
+
+    The board is restored before returning.
+    """
+    goals = {1: 0, 2: board.rows - 1}
+    fields = {turn: board.get_distance_field(goal) for turn, goal in goals.items()}
+    undo_tokens = []
+
+    try:
+        for _ in range(max_plies):
+            result = winner(board)
+            if result is not None:
+                return result
+
+            turn = board.get_current_turn()
+            player = board.get_current_player()
+            opponent = board.get_player2() if turn == 1 else board.get_player1()
+
+            if player.get_number_of_walls() > 0 and rng.random() < ROLLOUT_WALL_PROBABILITY:
+                orientation = rng.choice('hv')
+                row = rng.randrange(board.rows - 1)
+                column = rng.randrange(board.columns - 1)
+                can_place = (board.can_place_horizontal_wall(row, column) if orientation == 'h'
+                             else board.can_place_vertical_wall(row, column))
+                if can_place:
+                    undo_tokens.append(board.make_move((WALL_MOVE_CODE, (row, column), orientation)))
+                    fields = {t: board.get_distance_field(goal) for t, goal in goals.items()}
+                    continue
+
+            field = fields[turn]
+            pawn_moves = board.get_valid_moves(player.get_position(), opponent.get_position())
+            columns = board.columns
+            best = min(field[row * columns + column] for row, column in pawn_moves)
+            step = rng.choice([move for move in pawn_moves if field[move[0] * columns + move[1]] == best])
+            undo_tokens.append(board.make_move((PAWN_MOVE_CODE, step)))
+
+        result = winner(board)
+        if result is not None:
+            return result
+
+        distance1 = pathfinding.goal_distance(board, board.get_player1_pos(), goals[1])
+        distance2 = pathfinding.goal_distance(board, board.get_player2_pos(), goals[2])
+        if distance1 == distance2:
+            return board.get_current_turn()
+        return 1 if distance1 < distance2 else 2
+    finally:
+        for undo_token in reversed(undo_tokens):
+            board.unmake_move(undo_token)
+
+
+def _rollout_batch(encoded_positions, seed):
+    """Worker task: one rollout per encoded position"""
+    rng = random.Random(seed)
+    return [rollout(Position.decode(encoded), rng) for encoded in encoded_positions]
+
+
+class MCTSPlayer(AIPlayer):
+    """
+    AI player that picks moves with UCT Monte Carlo Tree Search.
+
+    Shares move generation, make/unmake and cancellation with AIPlayer; only the
+    move choice differs.
+    """
+
+    def __init__(self, board=None, player_id=1, objective=0, exploration=1.4,
+                 time_budget=DEFAULT_TIME_BUDGET, workers=1, batch_size=None, seed=None):
+        """
+        Args:
+            board: Board object containing game state
+            player_id: ID of this player (1 or 2)
+            objective: Row the player needs to reach
+            exploration: UCT exploration constant
+            time_budget: Default seconds per move when ai_move gets no budget
+            workers: Processes used for rollouts (1 = rollouts in this process)
+            batch_size: Leaves selected per batch before their rollouts run, defaults to
+                BATCH_SIZE (PARALLEL_BATCH_SIZE with workers > 1, where a batch is one
+                worker task and larger batches spread the inter-process overhead)
+            seed: Seed of the rollout random generator
+        """
+        super().__init__(board, player_id, objective, difficulty='hard', workers=1)
+        self.difficulty = 'mcts'
+        self.exploration = exploration
+        self.time_budget = time_budget
+        self.rollout_workers = workers
+        if batch_size is None:
+            batch_size = PARALLEL_BATCH_SIZE if workers > 1 else BATCH_SIZE
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+
+        self.root = None
+        self.rollout_pool = None
+        self.rollouts = 0
+        self.rollouts_per_second = 0.0
+        self.reused_visits = 0
+
+    def engine_options(self):
+        return {
+            'exploration': self.exploration,
+            'time_budget': self.time_budget,
+            'workers': self.rollout_workers,
+            'batch_size': self.batch_size,
+        }
+
+    def close(self):
+        super().close()
+        if self.rollout_pool is not None:
+            self.rollout_pool.shutdown(wait=True, cancel_futures=True)
+            self.rollout_pool = None
+
+    def reuse_tree(self, board):
+        """Re-root the kept tree on board's position if it is one of the known replies"""
+        key = board.get_hash()
+        if self.root is not None:
+            if self.root.key == key:
+                return self.root
+            for child in self.root.children:
+                if child.key == key:
+                    child.parent = None
+                    child.move = None
+                    return child
+        return MCTSNode(key=key)
+
+    def select_and_expand(self, board, root):
+        """
+        Walk down the tree with UCT (adding one virtual visit per node) and expand one move.
+
+        Returns:
+            (leaf node, undo tokens of the moves applied to board)
+        """
+        node = root
+        undo_tokens = []
+        node.visits += 1
+
+        while winner(board) is None:
+            if node.untried_moves is None:
+                # Pawn moves are tried before the (many) wall moves
+                node.untried_moves = sorted(self.get_valid_moves(board), key=lambda m: -m[0])
+            if node.untried_moves:
+                move = node.untried_moves.pop()
+                mover = board.get_current_turn()
+                undo_tokens.append(board.make_move(move))
+                child = MCTSNode(move, mover, node, board.get_hash())
+                node.children.append(child)
+                child.visits += 1
+                return child, undo_tokens
+            if not node.children:
+                break
+            node = node.uct_child(self.exploration)
+            undo_tokens.append(board.make_move(node.move))
+            node.visits += 1
+
+        return node, undo_tokens
+
+    def backpropagate(self, node, result):
+        # Visits were already counted on the way down, only the wins are added here
+        while node is not None:
+            if node.mover == result:
+                node.wins += 1
+            node = node.parent
+
+    def search(self, board, time_budget=None, node_budget=None):
+        """
+        Run MCTS from board until the time or rollout budget is used up.
+
+        Returns:
+            Most visited root move
+        """
+        root = self.reuse_tree(board)
+        self.reused_visits = root.visits
+        deadline = time.time() + (time_budget if time_budget is not None else self.time_budget)
+        start = time.time()
+        self.rollouts = 0
+
+        # Batches whose rollouts run in the worker processes, oldest first. Their
+        # leaves already carry a visit, which steers selection elsewhere meanwhile.
+        in_flight = deque()
+        max_in_flight = self.rollout_workers * BATCHES_PER_WORKER
+
+        while True:
+            if self.stop_event is not None and self.stop_event.is_set():
+                break
+            if time.time() >= deadline or (node_budget is not None and self.rollouts >= node_budget):
+                break
+
+            batch = []
+            for _ in range(self.batch_size):
+                leaf, undo_tokens = self.select_and_expand(board, root)
+                result = winner(board)
+                if result is None and self.rollout_workers <= 1:
+                    result = rollout(board, self.rng)
+                # Leaves still without a result are played out by the worker processes
+                batch.append((leaf, result, board.encode() if result is None else None))
+                for undo_token in reversed(undo_tokens):
+                    board.unmake_move(undo_token)
+            self.rollouts += len(batch)
+
+            pending = [encoded for _, result, encoded in batch if result is None]
+            if not pending:
+                self.finish_batch(batch, None)
+                continue
+
+            # Keep selecting while the workers play earlier batches out
+            in_flight.append((batch, self.submit_rollouts(pending)))
+            if len(in_flight) >= max_in_flight:
+                self.finish_batch(*in_flight.popleft())
+
+        # Collect the outstanding batches so the kept tree has no unscored visits
+        while in_flight:
+            self.finish_batch(*in_flight.popleft())
+
+        elapsed = time.time() - start
+        self.rollouts_per_second = self.rollouts / elapsed if elapsed > 0 else 0.0
+
+        self.root = root
+        if not root.children:
+            return None
+        return max(root.children, key=lambda child: child.visits).move
+
+    def submit_rollouts(self, encoded_positions):
+        """Start the rollouts of one batch in a worker process, returns their future"""
+        if self.rollout_pool is None:
+            self.rollout_pool = ProcessPoolExecutor(max_workers=self.rollout_workers)
+        return self.rollout_pool.submit(_rollout_batch, encoded_positions, self.rng.getrandbits(32))
+
+    def finish_batch(self, batch, future):
+        """Backpropagate a batch, taking the missing results from its rollout future"""
+        results = iter(future.result()) if future is not None else None
+        for leaf, result, _ in batch:
+            self.backpropagate(leaf, result if result is not None else next(results))
+
+    def ai_move(self, time_budget=None, node_budget=None):
+        """
+        Execute an MCTS move on self.board
+
+        Args:
+            time_budget: Seconds to search, defaults to self.time_budget
+            node_budget: Maximum number of rollouts, or None
+        """
+        board = Position.from_board(self.board)
+        valid_moves = self.get_valid_moves(board)
+        if not valid_moves:
+            return ()
+
+        goal_row = board.rows - 1 if board.get_current_turn() == 2 else 0
+        best_move = next((m for m in valid_moves if m[0] == PAWN_MOVE_CODE and m[1][0] == goal_row), None)
+        if best_move is None:
+            best_move = self.search(board, time_budget, node_budget) or valid_moves[0]
+        self.advance_root(best_move)
+
+        self.apply_move(self.board, best_move)
+        print(best_move, f"{self.rollouts} rollouts ({self.rollouts_per_second:.0f}/s)")
+        return best_move
+
+    def advance_root(self, move):
+        """Keep only the subtree below the move actually played"""
+        if self.root is None:
+            return
+        self.root = next((child for child in self.root.children if child.move == move), None)
+        if self.root is not None:
+            self.root.parent = None
+
+    def get_search_stats(self):
+        return {
+            'rollouts': self.rollouts,
+            'rollouts_per_second': self.rollouts_per_second,
+            'reused_visits': self.reused_visits,
+            'root_visits': self.root.visits if self.root is not None else 0,
+        }
@@ -0,0 +1,118 @@
+"""
+Parallel root search for AIPlayer.
+Root moves are distributed over a process pool; every worker keeps its own
+AIPlayer (and transposition table) and all workers share the best root score
+found so far, which they use as alpha for the moves they still have to search.
+
+Positions are shipped as Position.encode() tuples, never as pickled Board/GameState.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from position import Position
+
+# Root moves are searched with alpha just below the shared best score, so a move
+# that ties the best is still searched exactly and ties are broken by move order
+# exactly like the serial search does.
+TIE_MARGIN = 1e-6
+
+# Worker process state, set by _init_worker
+_engine = None
+_shared_best = None
+
+
+def _init_worker(shared_best, engine_options):
+    global _engine, _shared_best
+    from AIPlayer import AIPlayer
+
+    _engine = AIPlayer(**engine_options)
+    _shared_best = shared_best
+
+
+def _search_root_move(encoded_position, move, depth, deadline):
+    """
+    Worker task: search one root move at the given depth.
+
+    Returns:
+        The move's score (exact if above the shared bound), or None on timeout
+    """
+    from AIPlayer import SearchTimeout
+
+    board = Position.decode(encoded_position)
+    board.make_move(move)
+
+    alpha = _shared_best.value - TIE_MARGIN
+    # Each task searches from a different position: drop killers, age history
+    _engine.new_search()
+    _engine.nodes = 0
+    _engine.deadline = deadline
+    try:
+        value = _engine.alpha_beta(board, depth, alpha, float('inf'))
+    except SearchTimeout:
+        return None, _engine.nodes
+    finally:
+        _engine.deadline = None
+
+    with _shared_best.get_lock():
+        if value > _shared_best.value:
+            _shared_best.value = value
+
+    return value, _engine.nodes
+
+
+class ParallelRootSearch:
+    """Process pool that searches the root moves of one position concurrently"""
+
+    def __init__(self, workers, engine_options):
+        """
+        Args:
+            workers: Number of worker processes
+            engine_options: Keyword arguments used to build each worker's AIPlayer
+        """
+        self.workers = workers
+        self.shared_best = multiprocessing.Value('d', -float('inf'))
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(self.shared_best, engine_options))
+
+    def search_root(self, board, root_moves, depth, deadline=None):
+        """
+        Parallel equivalent of AIPlayer.search_root.
+
+        Every root move is searched with an open window above the shared best score,
+        and the highest score wins, ties going to the earliest move in root_moves.
+        Root moves are never reduced, as in the serial search, so both pick the
+        same move at equal depth while the search is exact. With late move
+        reductions enabled, reduced subtrees depend on the window each root move
+        was searched with, so the two may pick different moves.
+
+        Returns:
+            (best_move, best_value, completed, nodes)
+        """
+        with self.shared_best.get_lock():
+            self.shared_best.value = -float('inf')
+
+        encoded_position = board.encode()
+        futures = [self.pool.submit(_search_root_move, encoded_position, move, depth, deadline)
+                   for move in root_moves]
+        results = [future.result() for future in futures]
+
+        nodes = sum(result[1] for result in results)
+        completed = all(result[0] is not None for result in results)
+
+        # Mirror the serial contract on timeout: only trust the result if the first
+        # root move (the previous iteration's best) finished
+        if not completed and results[0][0] is None:
+            return None, -float('inf'), False, nodes
+
+        best_move = None
+        best_value = -float('inf')
+        for move, (value, _) in zip(root_moves, results):
+            if value is not None and value > best_value:
+                best_value = value
+                best_move = move
+
+        return best_move, best_value, completed, nodes
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
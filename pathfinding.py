@@ -3,16 +3,46 @@ Pathfinding and validation for Quoridor game.
 Makes sure walls don't trap players and validates all moves.
 """
 
-from collections import deque
+import math
+from collections import OrderedDict, deque
 
-def has_valid_path(board, player_pos, goal_row):
+import bitboard
+
+# Reachability routine behind has_valid_path:
+#   'bfs'      - cell by cell breadth-first search
+#   'bitboard' - bit-parallel flood fill over the wall bitboards
+#   'cached'   - goal_component lookup, flood filled once per wall configuration
+PATH_BACKENDS = ('bfs', 'bitboard', 'cached')
+path_backend = 'cached'
+
+# Goal reachability cached per wall configuration, see goal_component.
+# The LRU caches of this module are shared by the UI thread (wall previews) and
+# the AI worker thread. Each dict call is atomic under the GIL, but the other
+# thread can evict a key between get and move_to_end: the hit is then reinserted
+# (see _touch) instead of raising KeyError.
+REACHABILITY_CACHE_SIZE = 65536
+_reachability_cache = OrderedDict()
+_reachability_hits = 0
+_reachability_misses = 0
+
+
+def set_path_backend(backend):
+    """Select the reachability routine used by has_valid_path (one of PATH_BACKENDS)"""
+    global path_backend
+    if backend not in PATH_BACKENDS:
+        raise ValueError(f"Unknown path backend: {backend}")
+    path_backend = backend
+
+
+def has_valid_path(board, player_pos, goal_row, backend=None):
     """
-    Check if player can reach their goal row using BFS pathfinding.
+    Check if player can reach their goal row.
     
     Args:
         board: Board object containing game state
         player_pos: Tuple (row, col) of player's current position
         goal_row: Target row the player needs to reach (0 for player 1, board.rows-1 for player 2)
+        backend: One of PATH_BACKENDS, defaults to the backend chosen with set_path_backend
     
     Returns:
         True if a valid path exists, False otherwise
@@ -23,36 +53,542 @@ def has_valid_path(board, player_pos, goal_row):
     
     if goal_row < 0 or goal_row >= board.rows:
         return False
-    
-    visited = set()
-    queue = deque([player_pos])
-    visited.add(player_pos)
 
-    # Four orthogonal directions: up, down, left, right
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    backend = backend or path_backend
+    if backend == 'cached':
+        return bool(goal_component(board, goal_row) >> (player_pos[0] * board.columns + player_pos[1]) & 1)
+    if backend == 'bitboard':
+        return _has_valid_path_bitboard(board, player_pos, goal_row)
+    return _has_valid_path_bfs(board, player_pos, goal_row)
+
+
+def goal_component(board, goal_row):
+    """
+    Bitboard of every cell connected to the goal row with the board's current walls.
+
+    A pawn reaches its goal exactly when it stands in this set, so one entry
+    answers has_valid_path for any pawn position. Entries are kept in an LRU
+    cache keyed by the wall bitboards themselves: the candidate walls that
+    can_place_*_wall adds temporarily are not in board.wall_key.
+    On a miss the set is grown bit-parallel from the goal row until it stops growing.
+    """
+    global _reachability_hits, _reachability_misses
+    key = (board.rows, board.columns, board.h_bits, board.v_bits, goal_row)
+    component = _reachability_cache.get(key)
+    if component is not None:
+        _reachability_hits += 1
+        _touch(_reachability_cache, key, component)
+        return component
+
+    _reachability_misses += 1
+    columns = board.columns
+    up, down, left, right = bitboard.open_edges(board.h_bits, board.v_bits, board.rows, columns)
+    component = bitboard.board_masks(board.rows, columns)['row'][goal_row]
+    while True:
+        grown = component | _expand(component, up, down, left, right, columns)
+        if grown == component:
+            break
+        component = grown
+
+    _reachability_cache[key] = component
+    _evict(_reachability_cache, REACHABILITY_CACHE_SIZE)
+    return component
+
+
+def _touch(cache, key, value):
+    # Mark a cache hit as most recently used, reinserting it if it was just evicted
+    try:
+        cache.move_to_end(key)
+    except KeyError:
+        cache[key] = value
+
+
+def _evict(cache, size):
+    # Drop the least recently used entries beyond size
+    while len(cache) > size:
+        try:
+            cache.popitem(last=False)
+        except KeyError:
+            break  # emptied by another thread
+
+
+def get_reachability_stats():
+    """Hit/miss counters and size of the reachability cache"""
+    lookups = _reachability_hits + _reachability_misses
+    return {
+        'hits': _reachability_hits,
+        'misses': _reachability_misses,
+        'hit_rate': _reachability_hits / lookups if lookups else 0.0,
+        'entries': len(_reachability_cache),
+    }
+
+
+def clear_reachability_cache():
+    global _reachability_hits, _reachability_misses
+    _reachability_cache.clear()
+    _reachability_hits = 0
+    _reachability_misses = 0
+
+
+def _has_valid_path_bfs(board, player_pos, goal_row):
+    # Cell by cell BFS over the precomputed neighbour table
+    columns = board.columns
+    table = bitboard.neighbour_table(board.rows, columns)
+    h_bits, v_bits = board.h_bits, board.v_bits
+    start = player_pos[0] * columns + player_pos[1]
+    goal_first = goal_row * columns
+
+    visited = {start}
+    queue = deque([start])
 
     while queue:
-        current_row, current_col = queue.popleft()
+        cell = queue.popleft()
 
         # Check if we reached the goal row
-        if current_row == goal_row:
+        if goal_first <= cell < goal_first + columns:
             return True
 
-        # Explore all adjacent positions
-        for d_row, d_col in directions:
-            next_pos = (current_row + d_row, current_col + d_col)
-            
-            # Check if next position is valid, unvisited, and not blocked by a wall
-            if (board.is_inside_board(next_pos) and 
-                next_pos not in visited and
-                not board.is_wall_between((current_row, current_col), next_pos)):
-                
-                visited.add(next_pos)
-                queue.append(next_pos)
+        # Explore the neighbours whose edge is not blocked by a wall
+        for _, neighbour, in_h, bit in table[cell]:
+            if neighbour not in visited and not (h_bits if in_h else v_bits) & bit:
+                visited.add(neighbour)
+                queue.append(neighbour)
 
     return False
 
 
+def _has_valid_path_bitboard(board, player_pos, goal_row):
+    # The reachable set is one integer; every round moves all of it one step in the
+    # four directions at once, using masks of the cells whose edge that way is open
+    columns = board.columns
+    up, down, left, right = bitboard.open_edges(board.h_bits, board.v_bits, board.rows, columns)
+    goal = bitboard.board_masks(board.rows, columns)['row'][goal_row]
+
+    reached = 1 << bitboard.cell_index(player_pos, columns)
+    while not reached & goal:
+        grown = (reached
+                 | (reached & up) >> columns
+                 | (reached & down) << columns
+                 | (reached & left) >> 1
+                 | (reached & right) << 1)
+        if grown == reached:
+            return False
+        reached = grown
+
+    return True
+
+
+def shortest_path(board, player_pos, goal_row):
+    """
+    Find one shortest path from the player to their goal row using BFS.
+
+    Args:
+        board: Board object containing game state
+        player_pos: Tuple (row, col) of player's current position
+        goal_row: Target row the player needs to reach
+
+    Returns:
+        List of positions from player_pos to a goal square (both included),
+        or None if the goal row cannot be reached
+    """
+    if not board.is_inside_board(player_pos) or goal_row < 0 or goal_row >= board.rows:
+        return None
+
+    columns = board.columns
+    table = bitboard.neighbour_table(board.rows, columns)
+    positions = bitboard.cell_positions(board.rows, columns)
+    h_bits, v_bits = board.h_bits, board.v_bits
+    start = player_pos[0] * columns + player_pos[1]
+    goal_first = goal_row * columns
+
+    parents = {start: None}
+    queue = deque([start])
+
+    while queue:
+        cell = queue.popleft()
+
+        if goal_first <= cell < goal_first + columns:
+            path = []
+            while cell is not None:
+                path.append(positions[cell])
+                cell = parents[cell]
+            path.reverse()
+            return path
+
+        for _, neighbour, in_h, bit in table[cell]:
+            if neighbour not in parents and not (h_bits if in_h else v_bits) & bit:
+                parents[neighbour] = cell
+                queue.append(neighbour)
+
+    return None
+
+
+# Distance fields kept for the most recently used wall configurations
+DISTANCE_CACHE_SIZE = 4096
+_distance_cache = OrderedDict()
+
+
+def distance_field(board, goal_row):
+    """
+    Distance from every cell to the goal row, ignoring pawns.
+
+    One multi-source BFS from the whole goal row, run bit-parallel on the wall
+    bitboards. Fields are cached per wall configuration (board.wall_key), so
+    looking up any pawn position afterwards is O(1).
+
+    Args:
+        board: Board object containing game state
+        goal_row: Target row
+
+    Returns:
+        List indexed by cell (row * columns + column); math.inf where the goal is unreachable.
+        The list is shared through the cache and must not be modified.
+    """
+    return distance_layers(board, goal_row)[0]
+
+
+def distance_layers(board, goal_row):
+    """
+    Same as distance_field, together with the BFS layers.
+
+    Returns:
+        (field, layers) where layers[d] is the bitboard of the cells at distance d.
+        Both lists are shared through the cache and must not be modified.
+    """
+    rows, columns = board.rows, board.columns
+    key = (rows, columns, board.wall_key, goal_row)
+    entry = _distance_cache.get(key)
+    if entry is not None:
+        _touch(_distance_cache, key, entry)
+        return entry
+
+    up, down, left, right = bitboard.open_edges(board.h_bits, board.v_bits, rows, columns)
+    field = [math.inf] * (rows * columns)
+    layers = []
+
+    frontier = reached = bitboard.board_masks(rows, columns)['row'][goal_row]
+    while frontier:
+        _set_distance(field, frontier, len(layers))
+        layers.append(frontier)
+        frontier = _expand(frontier, up, down, left, right, columns) & ~reached
+        reached |= frontier
+
+    entry = (field, layers)
+    _distance_cache[key] = entry
+    _evict(_distance_cache, DISTANCE_CACHE_SIZE)
+    return entry
+
+
+def _expand(frontier, up, down, left, right, columns):
+    # Cells one step from the frontier: neighbours whose edge towards it is open
+    return (((frontier << columns) & up)
+            | ((frontier >> columns) & down)
+            | ((frontier << 1) & left)
+            | ((frontier >> 1) & right))
+
+
+def _set_distance(field, cells, distance, changes=None):
+    # Write distance for every cell in the bitboard, optionally logging the old values
+    while cells:
+        low_bit = cells & -cells
+        index = low_bit.bit_length() - 1
+        if changes is not None:
+            changes.append((index, field[index]))
+        field[index] = distance
+        cells ^= low_bit
+
+
+def goal_distance(board, position, goal_row):
+    """Shortest path length from position to goal_row (math.inf if blocked)"""
+    return board.get_distance_field(goal_row)[position[0] * board.columns + position[1]]
+
+
+def pawn_distance(board, player_pos, opponent_pos, goal_row):
+    """
+    Exact number of pawn moves to the goal row with the opponent standing still.
+
+    Unlike the distance fields this follows Board.get_valid_moves: the opponent's
+    square cannot be entered, it can be jumped straight over, and when the jump
+    is blocked the pawn may step diagonally around it. The search is a plain BFS
+    over the precomputed move table (bitboard.pawn_move_table).
+
+    Args:
+        board: Board object containing game state
+        player_pos: Tuple (row, col) of the moving pawn
+        opponent_pos: Tuple (row, col) of the opponent's pawn
+        goal_row: Goal row of the moving pawn
+
+    Returns:
+        Number of moves, or math.inf if the pawn cannot get past the opponent
+    """
+    columns = board.columns
+    start = player_pos[0] * columns + player_pos[1]
+    opponent = opponent_pos[0] * columns + opponent_pos[1]
+
+    # An opponent off every shortest path can neither block it nor shorten it with a
+    # jump (passing its square costs at least one step more than the jump saves)
+    field = board.get_distance_field(goal_row)
+    detour = abs(player_pos[0] - opponent_pos[0]) + abs(player_pos[1] - opponent_pos[1])
+    if field[start] == math.inf or detour + field[opponent] > field[start]:
+        return field[start]
+
+    table = bitboard.pawn_move_table(board.rows, columns)
+    h_bits, v_bits = board.h_bits, board.v_bits
+    goal_first = goal_row * columns
+
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        if goal_first <= cell < goal_first + columns:
+            return distances[cell]
+
+        for _, neighbour, in_h, bit, jump, diagonals in table[cell]:
+            if (h_bits if in_h else v_bits) & bit:
+                continue
+            if neighbour != opponent:
+                targets = ((neighbour, True, 0),)
+            elif jump is not None and not (h_bits if jump[1] else v_bits) & jump[2]:
+                targets = (jump,)
+            else:
+                # Straight jump blocked: step diagonally around the opponent
+                targets = diagonals
+            for target, target_in_h, target_bit in targets:
+                if target not in distances and not (h_bits if target_in_h else v_bits) & target_bit:
+                    distances[target] = distances[cell] + 1
+                    queue.append(target)
+
+    return math.inf
+
+
+def update_distance_field(board, goal_row, field, layers, blocked_edges):
+    """
+    Update a distance field and its layers in place after edges were blocked.
+
+    Walls only make distances grow, and only from the first layer that held the
+    far end of a blocked shortest-path edge. The BFS is re-run bit-parallel
+    from the layer before that one and stops as soon as its layers match the
+    old ones again; only cells whose distance changed are written. A wall layout
+    already in the distance cache (reached through another move order) is copied.
+
+    Args:
+        board: Board whose walls (and wall_key) already include the blocked edges
+        goal_row: Goal row of the field
+        field, layers: Distance field and layers (see distance_layers) before the change
+        blocked_edges: Pairs of cell indices whose shared edge was blocked
+
+    Returns:
+        Undo record for restore_distance_field
+    """
+    key = (board.rows, board.columns, board.wall_key, goal_row)
+    cached = _distance_cache.get(key)
+    if cached is not None:
+        _touch(_distance_cache, key, cached)
+        undo_record = (field[:], None, 0, layers[:])
+        field[:] = cached[0]
+        layers[:] = cached[1]
+        return undo_record
+
+    undo_record = _update_distance_field(board, field, layers, blocked_edges)
+    _distance_cache[key] = (field[:], layers[:])
+    _evict(_distance_cache, DISTANCE_CACHE_SIZE)
+    return undo_record
+
+
+def _update_distance_field(board, field, layers, blocked_edges):
+    changes = []
+    suspects = [field[first] if field[first] > field[second] else field[second]
+                for first, second in blocked_edges
+                if abs(field[first] - field[second]) == 1]
+    if not suspects:
+        return None, changes, len(layers), []
+
+    start, last = min(suspects), max(suspects)
+    old_tail = layers[start:]
+    columns = board.columns
+    up, down, left, right = bitboard.open_edges(board.h_bits, board.v_bits, board.rows, columns)
+
+    reached = 0
+    for layer in layers[:start]:
+        reached |= layer
+    old_reached = reached
+
+    new_tail = []
+    frontier = layers[start - 1]
+    distance = start
+    while True:
+        frontier = _expand(frontier, up, down, left, right, columns) & ~reached
+        if not frontier:
+            break
+        reached |= frontier
+        old_layer = old_tail[distance - start] if distance - start < len(old_tail) else 0
+        old_reached |= old_layer
+
+        _set_distance(field, frontier & ~old_layer, distance, changes)
+        new_tail.append(frontier)
+
+        # Same layer and same reached set from here on: every later layer is unchanged
+        if distance >= last and frontier == old_layer and reached == old_reached:
+            new_tail.extend(old_tail[distance - start + 1:])
+            break
+        distance += 1
+
+    if not frontier:
+        # Cells the BFS no longer reaches are cut off from the goal
+        for layer in old_tail:
+            old_reached |= layer
+        _set_distance(field, old_reached & ~reached, math.inf, changes)
+
+    layers[start:] = new_tail
+    return None, changes, start, old_tail
+
+
+def restore_distance_field(field, layers, undo_record):
+    """Take back one update_distance_field"""
+    old_field, changes, start, old_tail = undo_record
+    if old_field is not None:
+        field[:] = old_field
+    else:
+        for index, distance in reversed(changes):
+            field[index] = distance
+    layers[start:] = old_tail
+
+
+def _open_neighbours(board, index):
+    # Cells reachable in one step from cell index with the board's current walls
+    h_bits, v_bits = board.h_bits, board.v_bits
+    return [neighbour for _, neighbour, in_h, bit in bitboard.neighbour_table(board.rows, board.columns)[index]
+            if not (h_bits if in_h else v_bits) & bit]
+
+
+def edge_criticality(board, player_pos, goal_row):
+    """
+    Count the shortest paths from a pawn to its goal row through every edge.
+
+    An edge u -> v lies on a shortest path when forward distance (from the pawn)
+    + 1 + backward distance (to the goal row) equals the path length. Along
+    such paths the forward distance of u is length - field[u], so the backward
+    field alone describes the shortest-path DAG. Paths through u -> v are the
+    paths from the pawn to u times the paths from v to the goal row.
+
+    Args:
+        board: Board object containing game state
+        player_pos: Tuple (row, col) of the pawn
+        goal_row: Goal row of the pawn
+
+    Returns:
+        Dict with:
+            'length': shortest path length (math.inf if the goal is unreachable)
+            'paths': number of distinct shortest paths
+            'h_paths' / 'v_paths': {segment index: shortest paths through it}
+            'h_critical' / 'v_critical': bitboards of the segments on every shortest path
+        Segments use the h_bits / v_bits numbering (see bitboard.py).
+    """
+    columns = board.columns
+    field = board.get_distance_field(goal_row)
+    start = player_pos[0] * columns + player_pos[1]
+    length = field[start]
+    result = {'length': length, 'paths': 0, 'h_paths': {}, 'v_paths': {},
+              'h_critical': 0, 'v_critical': 0}
+    if length == math.inf:
+        return result
+
+    # Forward pass: paths from the pawn to every DAG cell, one distance layer at a time
+    forward = {start: 1}
+    successors = {}
+    layer = [start]
+    for distance in range(length, 0, -1):
+        next_layer = {}
+        for cell in layer:
+            steps = [n for n in _open_neighbours(board, cell) if field[n] == distance - 1]
+            successors[cell] = steps
+            for step in steps:
+                next_layer[step] = next_layer.get(step, 0) + forward[cell]
+        forward.update(next_layer)
+        layer = list(next_layer)
+
+    # Backward pass: paths from every DAG cell to the goal row
+    backward = {cell: 1 for cell in layer}
+    for cell in sorted(successors, key=field.__getitem__):
+        backward[cell] = sum(backward[step] for step in successors[cell])
+
+    total = backward[start]
+    result['paths'] = total
+    for cell, steps in successors.items():
+        for step in steps:
+            count = forward[cell] * backward[step]
+            low, high = min(cell, step), max(cell, step)
+            orientation = 'h' if high - low == columns else 'v'
+            result[orientation + '_paths'][low] = count
+            if count == total:
+                result[orientation + '_critical'] |= 1 << low
+
+    return result
+
+
+def wall_impacts(board, player_pos, goal_row):
+    """
+    Increase of a pawn's goal distance caused by each wall slot, in one pass.
+
+    A wall blocks two edges and can only lengthen the path if every shortest
+    path uses one of them (see edge_criticality). When the paths through the
+    two edges add up to fewer than all shortest paths, some shortest path
+    survives and the wall scores 0 without a search. Only the walls left, which
+    cut every shortest path, run the incremental distance update on a copy of
+    the field. Legality of the walls is not checked.
+
+    Args:
+        board: Board object containing game state
+        player_pos: Tuple (row, col) of the pawn
+        goal_row: Goal row of the pawn
+
+    Returns:
+        (h_delta, v_delta): (rows-1) x (columns-1) grids indexed [row][column];
+        math.inf where the wall would cut the pawn off
+    """
+    rows, columns = board.rows, board.columns
+    h_delta = [[0] * (columns - 1) for _ in range(rows - 1)]
+    v_delta = [[0] * (columns - 1) for _ in range(rows - 1)]
+
+    criticality = edge_criticality(board, player_pos, goal_row)
+    length = criticality['length']
+    if length == math.inf:
+        return h_delta, v_delta
+
+    total = criticality['paths']
+    field = board.get_distance_field(goal_row)
+    layers = board.get_distance_layers(goal_row)
+    start = player_pos[0] * columns + player_pos[1]
+
+    for orientation, deltas in (('h', h_delta), ('v', v_delta)):
+        paths = criticality[orientation + '_paths']
+        critical = criticality[orientation + '_critical']
+        step = 1 if orientation == 'h' else columns
+        for row in range(rows - 1):
+            for column in range(columns - 1):
+                wall = board.wall_mask(orientation, row, column)
+                if not wall & critical:
+                    index = row * columns + column
+                    # A path may cross both edges, so the sum can only overcount
+                    if paths.get(index, 0) + paths.get(index + step, 0) < total:
+                        continue
+
+                # Temporarily add the wall and measure the new distance on copies
+                h_bits, v_bits = board.h_bits, board.v_bits
+                if orientation == 'h':
+                    board.h_bits |= wall
+                else:
+                    board.v_bits |= wall
+                new_field = field[:]
+                _update_distance_field(board, new_field, layers[:],
+                                       board.wall_edges(orientation, row, column))
+                board.h_bits, board.v_bits = h_bits, v_bits
+
+                deltas[row][column] = new_field[start] - length
+
+    return h_delta, v_delta
+
+
 def validate_wall_placement(board, orientation, row, column, player1_pos, player2_pos):
     """
     Check if wall placement is legal and doesn't block any player's path to their goal.
@@ -80,7 +616,7 @@ def validate_wall_placement(board, orientation, row, column, player1_pos, player
     if orientation == 'h':
         if column + 1 >= board.columns:
             return False
-        if row >= len(board.h_walls):
+        if row >= board.rows:
             return False
         if not board.can_place_horizontal_wall(row, column):
             return False
@@ -88,7 +624,7 @@ def validate_wall_placement(board, orientation, row, column, player1_pos, player
     elif orientation == 'v':
         if row + 1 >= board.rows:
             return False
-        if column >= len(board.v_walls[0]):
+        if column >= board.columns:
             return False
         if not board.can_place_vertical_wall(row, column):
             return False
@@ -98,12 +634,11 @@ def validate_wall_placement(board, orientation, row, column, player1_pos, player
         return False
 
     # Try placing the wall temporarily
+    wall = board.wall_mask(orientation, row, column)
     if orientation == 'h':
-        board.h_walls[row][column] = True
-        board.h_walls[row][column + 1] = True
+        board.h_bits |= wall
     else:  # orientation == 'v'
-        board.v_walls[row][column] = True
-        board.v_walls[row + 1][column] = True
+        board.v_bits |= wall
 
     # Check if both players can still reach their goals
     # Player 1 needs to reach row 0 (top), Player 2 needs to reach row board.rows-1 (bottom)
@@ -112,11 +647,9 @@ def validate_wall_placement(board, orientation, row, column, player1_pos, player
 
     # Remove the temporary wall
     if orientation == 'h':
-        board.h_walls[row][column] = False
-        board.h_walls[row][column + 1] = False
+        board.h_bits &= ~wall
     else:  # orientation == 'v'
-        board.v_walls[row][column] = False
-        board.v_walls[row + 1][column] = False
+        board.v_bits &= ~wall
 
     # Wall is valid only if both players can still reach their goals
     return player1_can_reach and player2_can_reach
@@ -142,14 +675,9 @@ def place_wall_with_validation(board, orientation, row, column, player1_pos, pla
         return False
 
     # Place the wall permanently
-    if orientation == 'h':
-        board.h_walls[row][column] = True
-        board.h_walls[row][column + 1] = True
-    elif orientation == 'v':
-        board.v_walls[row][column] = True
-        board.v_walls[row + 1][column] = True
-    else:
+    if orientation not in ['h', 'v']:
         return False
+    board.add_wall(orientation, row, column)
 
     return True
 
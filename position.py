@@ -0,0 +1,70 @@
+from board import Board
+from player import Player
+
+
+class Position(Board):
+    """
+    Lightweight board used by the AI search.
+
+    Shares every rule in Board (and pathfinding) but is detached from GameState:
+    moves never push snapshots to the undo history, never run game-over
+    detection and are never persisted.
+    """
+
+    def __init__(self, player1=None, player2=None, rows=9, columns=9, current_turn=1):
+        super().__init__(None, player1, player2, rows, columns)
+        self.set_current_turn(current_turn)
+
+    @classmethod
+    def from_board(cls, board):
+        """Copy the rule-relevant state of a Board (walls, pawns, wall counts, turn)"""
+        position = cls(copy_player(board.get_player1()), copy_player(board.get_player2()),
+                       board.rows, board.columns, board.get_current_turn())
+        position.h_bits = board.h_bits
+        position.v_bits = board.v_bits
+        position.zobrist_key = board.zobrist_key
+        position.wall_key = board.wall_key
+        return position
+
+    def to_board(self, game_state=None):
+        """Build a regular Board attached to game_state from this position"""
+        board = Board(game_state, copy_player(self.player1), copy_player(self.player2),
+                      self.rows, self.columns)
+        board.h_bits = self.h_bits
+        board.v_bits = self.v_bits
+        board.set_current_turn(self.current_turn)
+        board.zobrist_key = self.zobrist_key
+        board.wall_key = self.wall_key
+        return board
+
+    def encode(self):
+        """Compact tuple of plain ints, cheap to pickle and send to worker processes"""
+        return (self.rows, self.columns, self.h_bits, self.v_bits,
+                self.player1.get_position(), self.player2.get_position(),
+                self.player1.get_number_of_walls(), self.player2.get_number_of_walls(),
+                self.current_turn)
+
+    @classmethod
+    def decode(cls, data):
+        """Rebuild a Position from encode()"""
+        rows, columns, h_bits, v_bits, player1_pos, player2_pos, player1_walls, player2_walls, turn = data
+        player1 = Player('player1', tuple(player1_pos), 1)
+        player1.set_number_of_walls(player1_walls)
+        player2 = Player('player2', tuple(player2_pos), 2)
+        player2.set_number_of_walls(player2_walls)
+
+        position = cls(player1, player2, rows, columns, turn)
+        position.h_bits = h_bits
+        position.v_bits = v_bits
+        position.rehash()
+        return position
+
+    def record_state(self):
+        # No history and no game-over bookkeeping during search
+        return False
+
+
+def copy_player(player):
+    copied = Player(player.get_name(), player.get_position(), player.get_symbol())
+    copied.set_number_of_walls(player.get_number_of_walls())
+    return copied
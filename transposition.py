@@ -0,0 +1,93 @@
+"""
+Transposition table for the AI search.
+Stores search results by Zobrist key so positions reached through different
+move orders are only searched once.
+"""
+
+# Bound types stored with each score
+EXACT = 0
+LOWER_BOUND = 1   # real score >= stored score (search failed high)
+UPPER_BOUND = 2   # real score <= stored score (search failed low)
+
+# Rough CPython footprint of one entry: the tuple, its key/score objects and the list slot
+ENTRY_SIZE_BYTES = 200
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table with two slots per bucket:
+    - depth-preferred slot: only replaced by an entry searched at least as deep
+    - always-replace slot: takes every entry the depth-preferred slot rejects
+
+    Entries are tuples (key, depth, bound, score, best_move).
+    """
+
+    def __init__(self, size_mb=16):
+        """
+        Args:
+            size_mb: Memory budget for the table in megabytes
+        """
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_SIZE_BYTES))
+        self.clear()
+
+    def clear(self):
+        """Drop every entry and reset all counters"""
+        self.depth_slots = [None] * self.bucket_count
+        self.always_slots = [None] * self.bucket_count
+        self.filled = 0
+        self.new_search()
+
+    def new_search(self):
+        """Reset the per-search counters, entries are kept"""
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """Return the entry stored for key, or None"""
+        self.probes += 1
+        bucket = key % self.bucket_count
+
+        entry = self.depth_slots[bucket]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+
+        entry = self.always_slots[bucket]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+
+        return None
+
+    def store(self, key, depth, bound, score, best_move):
+        """Store a search result using the depth-preferred / always-replace scheme"""
+        self.stores += 1
+        bucket = key % self.bucket_count
+        entry = (key, depth, bound, score, best_move)
+
+        current = self.depth_slots[bucket]
+        if current is None or current[0] == key or depth >= current[1]:
+            if current is None:
+                self.filled += 1
+            self.depth_slots[bucket] = entry
+            return
+
+        if self.always_slots[bucket] is None:
+            self.filled += 1
+        self.always_slots[bucket] = entry
+
+    def get_stats(self):
+        """Hit-rate and fill statistics since the last new_search()"""
+        capacity = 2 * self.bucket_count
+        return {
+            'size_mb': self.size_mb,
+            'capacity': capacity,
+            'filled': self.filled,
+            'fill_rate': self.filled / capacity,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+        }
@@ -0,0 +1,110 @@
+"""
+Union-find over the wall graph of a Quoridor board.
+Nodes are the lattice points between cells ((rows + 1) x (columns + 1) corners)
+and every wall segment joins its two end points. All points on the board edge
+are one node, the border.
+
+A new wall can only cut the board into two parts if it closes a loop of walls
+and border, i.e. if two of its three points are already connected. Walls that
+do not close a loop are legal without any path search.
+"""
+
+
+class WallComponents:
+    """
+    Union-find (union by rank) with an undo log so walls added during the AI
+    search can be taken back in LIFO order. Paths are not compressed, because
+    compression could not be undone.
+    """
+
+    def __init__(self, rows, columns):
+        """
+        Args:
+            rows: Number of rows on the board
+            columns: Number of columns on the board
+        """
+        self.rows = rows
+        self.columns = columns
+        self.border = (rows + 1) * (columns + 1)
+        self.reset()
+
+    def reset(self):
+        """Forget every wall"""
+        self.parent = list(range(self.border + 1))
+        self.rank = [0] * (self.border + 1)
+        # One entry per union: (attached root, new parent root, parent rank grew)
+        self.history = []
+
+    def point(self, row, column):
+        """Node of the lattice point at the top-left corner of cell (row, column)"""
+        if row == 0 or column == 0 or row == self.rows or column == self.columns:
+            return self.border
+        return row * (self.columns + 1) + column
+
+    def wall_points(self, orientation, row, column):
+        """The three lattice points (end, middle, end) covered by a wall anchored at (row, column)"""
+        if orientation == 'h':
+            return (self.point(row + 1, column), self.point(row + 1, column + 1),
+                    self.point(row + 1, column + 2))
+        return (self.point(row, column + 1), self.point(row + 1, column + 1),
+                self.point(row + 2, column + 1))
+
+    def find(self, node):
+        while self.parent[node] != node:
+            node = self.parent[node]
+        return node
+
+    def union(self, first, second):
+        first = self.find(first)
+        second = self.find(second)
+        if first == second:
+            self.history.append(None)
+            return
+
+        if self.rank[first] > self.rank[second]:
+            first, second = second, first
+        grew = self.rank[first] == self.rank[second]
+        self.parent[first] = second
+        if grew:
+            self.rank[second] += 1
+        self.history.append((first, second, grew))
+
+    def closes_loop(self, orientation, row, column):
+        """True if two points of the wall are already connected through walls or the border"""
+        start, middle, end = (self.find(p) for p in self.wall_points(orientation, row, column))
+        return start == middle or middle == end or start == end
+
+    def add_wall(self, orientation, row, column):
+        """
+        Join the wall's points.
+
+        Returns:
+            Undo mark to pass to undo()
+        """
+        mark = len(self.history)
+        start, middle, end = self.wall_points(orientation, row, column)
+        self.union(start, middle)
+        self.union(middle, end)
+        return mark
+
+    def undo(self, mark):
+        """Take back every union made since mark"""
+        while len(self.history) > mark:
+            entry = self.history.pop()
+            if entry is None:
+                continue
+            child, root, grew = entry
+            self.parent[child] = child
+            if grew:
+                self.rank[root] -= 1
+
+    def rebuild(self, h_bits, v_bits):
+        """Recompute the components from wall bitboards (see bitboard.py for the layout)"""
+        self.reset()
+        for index in range(self.rows * self.columns):
+            row, column = divmod(index, self.columns)
+            if h_bits >> index & 1:
+                self.union(self.point(row + 1, column), self.point(row + 1, column + 1))
+            if v_bits >> index & 1:
+                self.union(self.point(row, column + 1), self.point(row + 1, column + 1))
+        self.history = []
@@ -0,0 +1,148 @@
+"""
+Batched wall legality for Quoridor.
+Checks every wall slot of a position in one call: the candidate wall layouts
+are stacked into one tensor and a flood fill runs for both pawns across all of
+them at the same time.
+
+The NumPy routine is opt-in (use_numpy): on a 9x9 board it is slower than the
+per-wall checks in Board, which are the default and need no NumPy.
+"""
+
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+
+def wall_legality_mask(board, use_numpy=False):
+    """
+    Legality of every wall slot for the position on board.
+
+    Same rules as Board.can_place_horizontal_wall / can_place_vertical_wall
+    (overlap, crossing and both pawns keeping a path to their goal row).
+
+    Args:
+        board: Board object containing game state
+        use_numpy: Flood fill all candidate layouts at once with NumPy instead of
+            one Board check per slot; ignored when NumPy is not installed
+
+    Returns:
+        (h_legal, v_legal): (rows-1) x (columns-1) boolean grids indexed [row][column]
+    """
+    if use_numpy and np is not None:
+        return _legality_mask_numpy(board)
+    return _legality_mask_per_wall(board)
+
+
+def _legality_mask_per_wall(board):
+    slots = [(row, column) for row in range(board.rows - 1) for column in range(board.columns - 1)]
+    h_legal = [[False] * (board.columns - 1) for _ in range(board.rows - 1)]
+    v_legal = [[False] * (board.columns - 1) for _ in range(board.rows - 1)]
+    for row, column in slots:
+        h_legal[row][column] = board.can_place_horizontal_wall(row, column)
+        v_legal[row][column] = board.can_place_vertical_wall(row, column)
+    return h_legal, v_legal
+
+
+def _bits_to_array(bits, rows, columns):
+    cells = rows * columns
+    data = np.frombuffer(bits.to_bytes((cells + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(data, bitorder='little')[:cells].reshape(rows, columns).astype(bool)
+
+
+@lru_cache(maxsize=None)
+def _candidate_segments(rows, columns):
+    """
+    Segments covered by each wall slot, horizontal slots first.
+
+    Returns:
+        (candidate_h, candidate_v) boolean arrays of shape (2 * slots, rows, columns)
+    """
+    slots = (rows - 1) * (columns - 1)
+    candidate_h = np.zeros((2 * slots, rows, columns), dtype=bool)
+    candidate_v = np.zeros((2 * slots, rows, columns), dtype=bool)
+    for slot in range(slots):
+        row, column = divmod(slot, columns - 1)
+        candidate_h[slot, row, column:column + 2] = True
+        candidate_v[slots + slot, row:row + 2, column] = True
+    candidate_h.flags.writeable = False
+    candidate_v.flags.writeable = False
+    return candidate_h, candidate_v
+
+
+def _legality_mask_numpy(board):
+    rows, columns = board.rows, board.columns
+    slots = (rows - 1) * (columns - 1)
+    h = _bits_to_array(board.h_bits, rows, columns)
+    v = _bits_to_array(board.v_bits, rows, columns)
+    candidate_h, candidate_v = _candidate_segments(rows, columns)
+
+    # Overlap and crossing, exactly as in Board.can_place_*_wall
+    overlap = (candidate_h & h).any(axis=(1, 2)) | (candidate_v & v).any(axis=(1, 2))
+    crossing = np.concatenate([
+        (v[:-1, :-1] & h[1:, :-1]).ravel(),
+        (h[:-1, :-1] & h[:-1, 1:]).ravel(),
+    ])
+    legal = ~overlap & ~crossing
+
+    # A wall that cuts neither pawn's current shortest path (Board.path_edges) cannot
+    # disconnect anything, only the remaining candidates are flooded
+    cuts_path = np.zeros_like(legal)
+    for player_number in (1, 2):
+        edges = board.path_edges(player_number)
+        if edges is None:
+            cuts_path[:] = True
+            break
+        path_h = _bits_to_array(edges[0], rows, columns)
+        path_v = _bits_to_array(edges[1], rows, columns)
+        cuts_path |= (candidate_h & path_h).any(axis=(1, 2)) | (candidate_v & path_v).any(axis=(1, 2))
+
+    candidates = np.flatnonzero(legal & cuts_path)
+    if candidates.size:
+        legal[candidates] = _paths_remain(board, h | candidate_h[candidates], v | candidate_v[candidates])
+
+    h_legal = legal[:slots].reshape(rows - 1, columns - 1)
+    v_legal = legal[slots:].reshape(rows - 1, columns - 1)
+    return h_legal, v_legal
+
+
+def _paths_remain(board, blocked_h, blocked_v):
+    """
+    Flood fill from both pawns over every candidate layout at once.
+
+    Args:
+        board: Board the pawn positions and goal rows are read from
+        blocked_h, blocked_v: (candidates, rows, columns) wall segment arrays
+
+    Returns:
+        Boolean array, True where both pawns still reach their goal row
+    """
+    count, rows, columns = blocked_h.shape
+
+    # Open edges per candidate; a trailing axis of 1 broadcasts over the two pawns
+    down = ~blocked_h[:, None, :-1, :]
+    up = down
+    right = ~blocked_v[:, None, :, :-1]
+    left = right
+
+    reached = np.zeros((count, 2, rows, columns), dtype=bool)
+    reached[:, 0][(slice(None),) + tuple(board.get_player1_pos())] = True
+    reached[:, 1][(slice(None),) + tuple(board.get_player2_pos())] = True
+    goal_rows = (0, rows - 1)
+
+    while True:
+        at_goal = reached[:, 0, goal_rows[0]].any(axis=1) & reached[:, 1, goal_rows[1]].any(axis=1)
+        if at_goal.all():
+            return at_goal
+
+        grown = reached.copy()
+        grown[:, :, 1:, :] |= reached[:, :, :-1, :] & down
+        grown[:, :, :-1, :] |= reached[:, :, 1:, :] & up
+        grown[:, :, :, 1:] |= reached[:, :, :, :-1] & right
+        grown[:, :, :, :-1] |= reached[:, :, :, 1:] & left
+
+        if np.array_equal(grown, reached):
+            return at_goal
+        reached = grown
@@ -0,0 +1,58 @@
+"""
+Zobrist keys for Quoridor positions.
+A position key is the XOR of one random 64-bit number per feature
+(pawn squares, wall segments, walls left per player, side to move), so it can be
+updated incrementally whenever a single feature changes.
+"""
+
+import random
+from functools import lru_cache
+
+# Wall counts are indexed directly, anything from 0 up to this bound is supported
+MAX_WALL_COUNT = 64
+
+
+@lru_cache(maxsize=None)
+def zobrist_tables(rows, columns):
+    """
+    Random keys for one board size.
+
+    The generator is seeded from the board size so every process (and every run)
+    builds the same tables and keys can be compared across them.
+
+    Args:
+        rows: Number of rows on the board
+        columns: Number of columns on the board
+
+    Returns:
+        Dict with:
+            'pawn': [player1 keys, player2 keys], one key per cell
+            'h' / 'v': one key per horizontal / vertical wall segment
+            'walls': [player1 keys, player2 keys], one key per walls-left count
+            'turn': keys indexed by current turn (1 or 2)
+    """
+    rng = random.Random(rows * 1000 + columns)
+    cells = rows * columns
+
+    def keys(count):
+        return [rng.getrandbits(64) for _ in range(count)]
+
+    return {
+        'pawn': [keys(cells), keys(cells)],
+        'h': keys(cells),
+        'v': keys(cells),
+        'walls': [keys(MAX_WALL_COUNT), keys(MAX_WALL_COUNT)],
+        'turn': [0] + keys(2),
+    }
+
+
+def wall_hash(h_bits, v_bits, rows, columns):
+    """Key of a wall configuration alone (all set segments XORed together)."""
+    tables = zobrist_tables(rows, columns)
+    key = 0
+    for bits, segment_keys in ((h_bits, tables['h']), (v_bits, tables['v'])):
+        while bits:
+            low_bit = bits & -bits
+            key ^= segment_keys[low_bit.bit_length() - 1]
+            bits ^= low_bit
+    return key